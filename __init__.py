@@ -1,5 +1,6 @@
 from .src.pose_detector import PoseDetector, calculate_angle
 from .src.pose_classifier import PoseClassifier
 from .src.yoga_pose_analyzer import YogaPoseAnalyzer
+from .src.frame_result import FrameResult
 
-__all__ = ['PoseDetector', 'calculate_angle', 'PoseClassifier', 'YogaPoseAnalyzer']
\ No newline at end of file
+__all__ = ['PoseDetector', 'calculate_angle', 'PoseClassifier', 'YogaPoseAnalyzer', 'FrameResult']
\ No newline at end of file
@@ -20,6 +20,7 @@ a = Analysis(
         ('assets/fonts', 'assets/fonts'),
         ('assets/themes', 'assets/themes'),
         ('reference_poses_weighted.json', '.'),
+        ('reference_flows.json', '.'),
         
         # Add only essential MediaPipe files
         (os.path.join(mediapipe_path, 'modules/pose_landmark/pose_landmark_cpu.binarypb'), 'mediapipe/modules/pose_landmark/'),
@@ -31,6 +32,13 @@ a = Analysis(
         ('src/yoga_pose_analyzer.py', 'src/yoga_pose_analyzer.py'),
         ('config/styles.py', 'config/styles.py'),
         ('src/pose_detector.py', 'src/pose_detector.py'),
+        ('src/frame_result.py', 'src/frame_result.py'),
+        ('src/session_analytics.py', 'src/session_analytics.py'),
+        ('src/motion_gate.py', 'src/motion_gate.py'),
+        ('src/video_exporter.py', 'src/video_exporter.py'),
+        ('src/sequence_matcher.py', 'src/sequence_matcher.py'),
+        ('src/live_pipeline.py', 'src/live_pipeline.py'),
+        ('src/results_sink.py', 'src/results_sink.py'),
     ],
     hiddenimports=[
         'cv2', 'PIL', 'PIL.Image', 'PIL.ImageTk', 'PIL._tkinter_finder', 
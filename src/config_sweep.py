@@ -0,0 +1,283 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import cv2
+import numpy as np
+
+from src.results_sink import open_sink
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
+UNKNOWN = "Unknown"
+
+
+def load_dataset(dataset_dir):
+    """
+    Collect labeled samples from a folder-per-pose layout:
+    dataset_dir/<pose name>/<image or video>
+    """
+    samples = []
+    for label in sorted(os.listdir(dataset_dir)):
+        label_dir = os.path.join(dataset_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for file_name in sorted(os.listdir(label_dir)):
+            extension = os.path.splitext(file_name)[1].lower()
+            if extension in IMAGE_EXTENSIONS or extension in VIDEO_EXTENSIONS:
+                samples.append((os.path.join(label_dir, file_name), label))
+    return samples
+
+
+def _resize(image, max_side):
+    """Downscale so the longest side is at most max_side (0 keeps native size)"""
+    if not max_side:
+        return image
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def _iter_frames(path, video_stride):
+    if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+        image = cv2.imread(path)
+        if image is not None:
+            yield image
+        return
+
+    cap = cv2.VideoCapture(path)
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % video_stride == 0:
+                yield frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def run_detector_config(config, samples, reference_file, video_stride, collect_records=False):
+    """
+    Run every sample through one detector configuration (worker process).
+    Classification uses threshold 0 so classifier thresholds can be swept
+    afterwards without re-running inference.
+    """
+    from src.pose_classifier import PoseClassifier
+    from src.yoga_pose_analyzer import YogaPoseAnalyzer
+
+    # Workers run side by side: keep each one single-threaded in OpenCV
+    cv2.setNumThreads(1)
+    classifier = PoseClassifier(reference_file=reference_file)
+
+    analyzer = YogaPoseAnalyzer(
+        model_complexity=config["model_complexity"],
+        min_detection_confidence=config["min_detection_confidence"],
+        min_tracking_confidence=config["min_tracking_confidence"]
+    )
+    true_labels, best_labels, scores, wall_times, cpu_times = [], [], [], [], []
+    records = []
+
+    for path, label in samples:
+        is_video = os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+        # Every video gets its own tracking detector; images share the static one
+        stream = path if is_video else None
+
+        for frame in _iter_frames(path, video_stride):
+            frame = _resize(frame, config["resolution"])
+
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            _, frame_result = analyzer.analyze_frame(frame, stream=stream)
+            best_label, score = UNKNOWN, 0.0
+            if frame_result.has_pose:
+                best_label, score = classifier.classify_frame(frame_result, threshold=0)
+            cpu_times.append(time.process_time() - cpu_start)
+            wall_times.append(time.perf_counter() - wall_start)
+
+            true_labels.append(label)
+            best_labels.append(best_label)
+            scores.append(score)
+            if collect_records:
+                record = frame_result.to_record()
+                record.update(config=config, true_label=label)
+                records.append((path, record))
+
+        if is_video:
+            analyzer.release(stream)
+
+    analyzer.close()
+    return {
+        "config": config,
+        "true_labels": true_labels,
+        "best_labels": best_labels,
+        "scores": np.asarray(scores, dtype=np.float32),
+        "wall_ms": np.asarray(wall_times, dtype=np.float32) * 1000,
+        "cpu_ms": np.asarray(cpu_times, dtype=np.float32) * 1000,
+        "records": records,
+    }
+
+
+def confusion_matrix(true_labels, predicted_labels):
+    """Return (labels, matrix) with rows = true label, columns = predicted label"""
+    labels = sorted(set(true_labels) | set(predicted_labels))
+    index = {label: i for i, label in enumerate(labels)}
+    matrix = np.zeros((len(labels), len(labels)), dtype=np.int64)
+    for true_label, predicted in zip(true_labels, predicted_labels):
+        matrix[index[true_label], index[predicted]] += 1
+    return labels, matrix
+
+
+def evaluate_thresholds(run, thresholds):
+    """Expand one detector run into one result per classifier threshold"""
+    true_labels = np.asarray(run["true_labels"], dtype=object)
+    best_labels = np.asarray(run["best_labels"], dtype=object)
+    frames = len(true_labels)
+    results = []
+
+    for threshold in thresholds:
+        predicted = np.where(run["scores"] > threshold, best_labels, UNKNOWN)
+        labels, matrix = confusion_matrix(true_labels.tolist(), predicted.tolist())
+        accuracy = float(np.mean(predicted == true_labels)) if frames else 0.0
+        results.append({
+            **run["config"],
+            "threshold": threshold,
+            "frames": frames,
+            "accuracy": round(accuracy, 4),
+            "mean_latency_ms": round(float(run["wall_ms"].mean()), 2) if frames else 0.0,
+            "p95_latency_ms": round(float(np.percentile(run["wall_ms"], 95)), 2) if frames else 0.0,
+            "mean_cpu_ms": round(float(run["cpu_ms"].mean()), 2) if frames else 0.0,
+            "confusion_labels": labels,
+            "confusion_matrix": matrix.tolist(),
+        })
+    return results
+
+
+def pareto_frontier(results, cost_key="mean_cpu_ms"):
+    """Configurations not beaten on both cost and accuracy, cheapest first"""
+    frontier = []
+    best_accuracy = -1.0
+    for result in sorted(results, key=lambda r: (r[cost_key], -r["accuracy"])):
+        if result["accuracy"] > best_accuracy:
+            frontier.append(result)
+            best_accuracy = result["accuracy"]
+    return frontier
+
+
+def cheapest_for_target(frontier, target):
+    """First (cheapest) frontier configuration meeting the accuracy target"""
+    for result in frontier:
+        if result["accuracy"] >= target:
+            return result
+    return None
+
+
+def run_sweep(dataset_dir, reference_file, complexities, detection_confidences,
+              tracking_confidences, resolutions, thresholds, workers=None, video_stride=5,
+              sink=None):
+    """
+    Evaluate every configuration. With a results sink, every analyzed frame
+    of every configuration is also published in "batch" mode.
+    """
+    samples = load_dataset(dataset_dir)
+    if not samples:
+        raise ValueError(f"No labeled images or videos found in {dataset_dir}")
+
+    configs = [
+        {
+            "model_complexity": complexity,
+            "min_detection_confidence": detection,
+            "min_tracking_confidence": tracking,
+            "resolution": resolution,
+        }
+        for complexity, detection, tracking, resolution in itertools.product(
+            complexities, detection_confidences, tracking_confidences, resolutions
+        )
+    ]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(run_detector_config, config, samples, reference_file, video_stride,
+                            sink is not None)
+            for config in configs
+        ]
+        for future in futures:
+            detector_result = future.result()
+            if sink:
+                for path, record in detector_result["records"]:
+                    sink.publish("batch", path, record)
+            results.extend(evaluate_thresholds(detector_result, thresholds))
+
+    return results, pareto_frontier(results)
+
+
+def print_report(results, frontier, targets):
+    header = f"{'cplx':>4} {'det':>5} {'trk':>5} {'res':>5} {'thr':>5} {'acc':>7} {'ms':>8} {'cpu ms':>8}"
+    print("PARETO FRONTIER (accuracy vs CPU per frame):")
+    print(header)
+    print("─" * len(header))
+    for r in frontier:
+        print(f"{r['model_complexity']:>4} {r['min_detection_confidence']:>5} "
+              f"{r['min_tracking_confidence']:>5} {r['resolution'] or 'full':>5} {r['threshold']:>5} "
+              f"{r['accuracy']:>7.2%} {r['mean_latency_ms']:>8.1f} {r['mean_cpu_ms']:>8.1f}")
+    print(f"\n{len(frontier)} of {len(results)} configurations on the frontier")
+
+    for target in targets:
+        best = cheapest_for_target(frontier, target)
+        if best is None:
+            print(f"Target {target:.0%}: no configuration reaches it")
+        else:
+            print(f"Target {target:.0%}: complexity={best['model_complexity']} "
+                  f"detection={best['min_detection_confidence']} tracking={best['min_tracking_confidence']} "
+                  f"resolution={best['resolution'] or 'full'} threshold={best['threshold']} "
+                  f"({best['accuracy']:.2%}, {best['mean_cpu_ms']:.1f} CPU ms/frame)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep detector and classifier settings for accuracy vs cost")
+    parser.add_argument("dataset", help="Folder with one sub-folder of images/videos per pose name")
+    parser.add_argument("--reference", default="reference_poses_weighted.json")
+    parser.add_argument("--complexity", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--detection-confidence", type=float, nargs="+", default=[0.5, 0.6, 0.7])
+    parser.add_argument("--tracking-confidence", type=float, nargs="+", default=[0.6])
+    parser.add_argument("--resolution", type=int, nargs="+", default=[0, 640, 480],
+                        help="Longest image side in pixels, 0 keeps the native size")
+    parser.add_argument("--threshold", type=float, nargs="+", default=[20, 30, 40, 50])
+    parser.add_argument("--targets", type=float, nargs="*", default=[0.8, 0.9],
+                        help="Accuracy targets (0-1) to pick the cheapest configuration for")
+    parser.add_argument("--video-stride", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="sweep_report.json")
+    parser.add_argument("--results", help="Also log every analyzed frame to this .jsonl/.sqlite file")
+    args = parser.parse_args()
+
+    # Offline run: an unbounded queue so no record is ever dropped
+    sink = open_sink(args.results, queue_size=0) if args.results else None
+    try:
+        results, frontier = run_sweep(
+            args.dataset, args.reference, args.complexity, args.detection_confidence,
+            args.tracking_confidence, args.resolution, args.threshold,
+            workers=args.workers, video_stride=args.video_stride, sink=sink
+        )
+    finally:
+        if sink:
+            sink.close()
+            print(json.dumps({"results_log": sink.stats()}))
+    print_report(results, frontier, args.targets)
+
+    with open(args.output, 'w') as f:
+        json.dump({"results": results, "frontier": frontier}, f, indent=4)
+    print(f"\nFull report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
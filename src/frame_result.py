@@ -0,0 +1,123 @@
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+
+class FrameResult:
+    """
+    Compact per-frame analysis record.
+
+    Landmarks and visibility share one contiguous (33, 4) float32 block and
+    the joint angles are a float32 vector ordered like joint_names. The
+    joint_names and labels tuples are shared between all records, so a
+    retained frame costs two small arrays and a handful of scalars. Dict and
+    protobuf views are rebuilt on demand for code that still expects them.
+
+    captured_at and processed_at are wall-clock times for exported records;
+    durations (holds, dwell, flow sampling) use the monotonic captured_mono.
+    """
+
+    __slots__ = (
+        "landmarks", "visibility", "angles", "joint_names", "image_size",
+        "label_index", "labels", "score", "mirrored",
+        "captured_at", "captured_mono", "processed_at", "inference_ms", "reused",
+    )
+
+    def __init__(self, joint_names, landmark_block=None, angles=None, image_size=(0, 0),
+                 captured_at=0.0, processed_at=0.0, inference_ms=0.0, reused=False,
+                 captured_mono=0.0):
+        if landmark_block is not None:
+            self.landmarks = landmark_block[:, :3]
+            self.visibility = landmark_block[:, 3]
+        else:
+            self.landmarks = None
+            self.visibility = None
+        self.angles = angles
+        self.joint_names = joint_names
+        self.image_size = image_size
+        self.label_index = -1
+        self.labels = None
+        self.score = 0.0
+        self.mirrored = False
+        self.captured_at = captured_at
+        self.captured_mono = captured_mono
+        self.processed_at = processed_at
+        self.inference_ms = inference_ms
+        self.reused = reused
+
+    @property
+    def has_pose(self):
+        return self.angles is not None
+
+    @property
+    def classified(self):
+        return self.labels is not None
+
+    @property
+    def pose_name(self):
+        if self.labels is None or self.label_index < 0:
+            return "Unknown"
+        return self.labels[self.label_index]
+
+    def set_label(self, labels, label_index, score, mirrored=False):
+        self.labels = labels
+        self.label_index = label_index
+        self.score = float(score)
+        self.mirrored = mirrored
+
+    def reuse(self, captured_at, processed_at, captured_mono):
+        """New record for a skipped frame that shares this frame's arrays"""
+        result = FrameResult(
+            self.joint_names,
+            image_size=self.image_size,
+            captured_at=captured_at,
+            processed_at=processed_at,
+            reused=True,
+            captured_mono=captured_mono
+        )
+        result.landmarks = self.landmarks
+        result.visibility = self.visibility
+        result.angles = self.angles
+        result.labels = self.labels
+        result.label_index = self.label_index
+        result.score = self.score
+        result.mirrored = self.mirrored
+        return result
+
+    def angle_dict(self):
+        """Angles as {joint name: float}, the format analyze_pose used to return"""
+        if self.angles is None:
+            return {}
+        return dict(zip(self.joint_names, self.angles.tolist()))
+
+    def pixel_landmarks(self):
+        """Landmarks as (33, 3) array with x and y scaled to image pixels"""
+        if self.landmarks is None:
+            return None
+        width, height = self.image_size
+        return self.landmarks * np.array([width, height, 1.0], dtype=np.float32)
+
+    @property
+    def pose_landmarks(self):
+        """MediaPipe NormalizedLandmarkList view, built on demand"""
+        if self.landmarks is None:
+            return None
+        from mediapipe.framework.formats import landmark_pb2
+
+        return landmark_pb2.NormalizedLandmarkList(landmark=[
+            landmark_pb2.NormalizedLandmark(x=x, y=y, z=z, visibility=v)
+            for (x, y, z), v in zip(self.landmarks.tolist(), self.visibility.tolist())
+        ])
+
+    def to_record(self):
+        """JSON-serializable dict for exports"""
+        return {
+            "captured_at": self.captured_at,
+            "processed_at": self.processed_at,
+            "inference_ms": round(self.inference_ms, 2),
+            "reused": self.reused,
+            "pose": self.pose_name if self.has_pose else None,
+            "score": round(self.score, 2),
+            "mirrored": self.mirrored,
+            "angles": {k: round(v, 2) for k, v in self.angle_dict().items()},
+        }
@@ -0,0 +1,54 @@
+from src.pose_detector import draw_pose_label
+
+
+class LivePipeline:
+    """
+    Per-frame work of the live camera loop: analysis, classification,
+    overlay, session statistics, flow tracking and the optional results
+    log. Shared by the GUI and the headless soak harness so both exercise
+    the same code path.
+    """
+
+    def __init__(self, analyzer, classifier, analytics=None, sequence_matcher=None,
+                 sink=None, source="camera"):
+        self.analyzer = analyzer
+        self.classifier = classifier
+        self.analytics = analytics
+        self.sequence_matcher = sequence_matcher
+        self.sink = sink
+        self.source = source
+        self.flow_match = None
+
+    def reset(self):
+        """Start a new live session"""
+        self.flow_match = None
+        if self.analytics:
+            self.analytics.reset()
+        if self.sequence_matcher:
+            self.sequence_matcher.reset()
+
+    def process(self, frame, motion_gate=None):
+        """
+        Analyze and annotate one frame, returning (processed frame, FrameResult)
+        """
+        processed_frame, frame_result = self.analyzer.analyze_frame(
+            frame, motion_gate=motion_gate, stream=self.source
+        )
+        
+        # Classify pose; frames skipped by the motion gate keep the cached label
+        if frame_result.has_pose:
+            if not frame_result.classified:
+                self.classifier.classify_frame(frame_result)
+            draw_pose_label(processed_frame, frame_result.pose_name, frame_result.score)
+        
+        # Feed session statistics and the flow timeline
+        if self.analytics:
+            self.analytics.update_frame(frame_result)
+        if self.sequence_matcher and self.sequence_matcher.update_frame(frame_result):
+            self.flow_match = self.sequence_matcher.match()
+        
+        # Non-blocking enqueue; the sink serializes and writes on its own thread
+        if self.sink:
+            self.sink.publish("live", self.source, frame_result)
+        
+        return processed_frame, frame_result
@@ -0,0 +1,83 @@
+import time
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Cheap frame-difference gate placed in front of pose inference.
+
+    Each frame is downsampled to a tiny grayscale thumbnail and compared with
+    the thumbnail of the last frame that was actually inferred. When the mean
+    absolute difference stays below the threshold the previous landmarks and
+    classification are reused; a refresh is forced after max_interval seconds
+    so results never go stale.
+    """
+
+    def __init__(self, threshold=3.0, max_interval=1.0, thumbnail_size=(64, 48)):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.thumbnail_size = thumbnail_size
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame, cached results and counters"""
+        self.reference = None
+        self._pending = None
+        self.last_refresh = 0.0
+        self.cached_results = None
+        self.cached_frame = None
+        self.last_score = 0.0
+
+        self.frames = 0
+        self.skipped = 0
+        self.inference_cpu = 0.0
+        self.gate_cpu = 0.0
+
+    def _thumbnail(self, image):
+        small = cv2.resize(image, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def should_skip(self, image):
+        """
+        Return True when the cached results can be reused for this frame.
+        Call store() after running inference on frames that are not skipped.
+        """
+        start = time.process_time()
+        self.frames += 1
+        self._pending = self._thumbnail(image)
+
+        skip = False
+        if self.reference is not None and self.cached_results is not None:
+            self.last_score = float(np.mean(cv2.absdiff(self._pending, self.reference)))
+            fresh = time.monotonic() - self.last_refresh < self.max_interval
+            skip = fresh and self.last_score < self.threshold
+
+        if skip:
+            self.skipped += 1
+        self.gate_cpu += time.process_time() - start
+        return skip
+
+    def store(self, results, frame_result, inference_cpu=0.0):
+        """Cache the results of a frame that went through full inference"""
+        self.reference = self._pending
+        self.last_refresh = time.monotonic()
+        self.cached_results = results
+        self.cached_frame = frame_result
+        self.inference_cpu += inference_cpu
+
+    def stats(self):
+        """Skip ratio and an estimate of the CPU time saved by skipping"""
+        processed = self.frames - self.skipped
+        mean_inference = self.inference_cpu / processed if processed else 0.0
+        saved = self.skipped * mean_inference - self.gate_cpu
+        total = self.inference_cpu + self.gate_cpu + max(saved, 0.0)
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+            "cpu_saved_seconds": max(saved, 0.0),
+            "cpu_saved_ratio": max(saved, 0.0) / total if total else 0.0,
+        }
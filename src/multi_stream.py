@@ -0,0 +1,374 @@
+import argparse
+import math
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from src.frame_result import NUM_LANDMARKS
+from src.results_sink import open_sink
+
+# Per-stream health counters stored in the ring header
+HEALTH_HEARTBEAT = 0
+HEALTH_FPS = 1
+HEALTH_FRAMES = 2
+HEALTH_ERRORS = 3
+HEALTH_STATE = 4
+HEALTH_FIELDS = 5
+
+# Per-slot metadata
+META_TIMESTAMP = 0
+META_LABEL = 1
+META_SCORE = 2
+META_HAS_POSE = 3
+META_FIELDS = 4
+
+STATE_STARTING = 0
+STATE_RUNNING = 1
+STATE_SOURCE_ERROR = 2
+STATE_STOPPED = 3
+STATE_NAMES = {
+    STATE_STARTING: "starting",
+    STATE_RUNNING: "running",
+    STATE_SOURCE_ERROR: "source error",
+    STATE_STOPPED: "stopped",
+}
+
+
+class SharedFrameRing:
+    """
+    Single-producer ring of annotated frames and landmark arrays in one
+    shared memory block. Each slot is guarded by a sequence counter
+    (odd while being written) so readers never pickle or lock anything.
+    """
+
+    def __init__(self, frame_shape, slots=4, name=None, create=False):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+
+        layout = [
+            ("write_index", np.int64, (1,)),
+            ("sequence", np.int64, (slots,)),
+            ("health", np.float64, (HEALTH_FIELDS,)),
+            ("meta", np.float64, (slots, META_FIELDS)),
+            ("landmarks", np.float32, (slots, NUM_LANDMARKS, 4)),
+            ("frames", np.uint8, (slots,) + self.frame_shape),
+        ]
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, dtype, shape in layout)
+
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        offset = 0
+        for field, dtype, shape in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, field, array)
+            offset += array.nbytes
+
+        if create:
+            self.write_index[0] = -1
+            self.sequence[:] = 0
+            self.health[:] = 0
+            self.health[HEALTH_STATE] = STATE_STARTING
+
+    def write(self, frame, landmarks, label_index, score, has_pose, timestamp):
+        """Copy one processed frame into the next slot (producer side)"""
+        slot = (int(self.write_index[0]) + 1) % self.slots
+        self.sequence[slot] += 1  # odd: slot is being written
+
+        if frame.shape != self.frame_shape:
+            frame = cv2.resize(frame, (self.frame_shape[1], self.frame_shape[0]))
+        self.frames[slot] = frame
+        if has_pose:
+            self.landmarks[slot] = landmarks
+        self.meta[slot, META_TIMESTAMP] = timestamp
+        self.meta[slot, META_LABEL] = label_index
+        self.meta[slot, META_SCORE] = score
+        self.meta[slot, META_HAS_POSE] = 1.0 if has_pose else 0.0
+
+        self.sequence[slot] += 1  # even: slot is consistent
+        self.write_index[0] = slot
+
+    def read_latest(self, out_frame=None):
+        """
+        Copy the most recent consistent slot (consumer side).
+        Returns (frame, landmarks, meta) or None if nothing was written yet.
+        """
+        for _ in range(self.slots):
+            slot = int(self.write_index[0])
+            if slot < 0:
+                return None
+
+            before = int(self.sequence[slot])
+            if before % 2:
+                continue
+            if out_frame is None:
+                out_frame = np.empty(self.frame_shape, dtype=np.uint8)
+            np.copyto(out_frame, self.frames[slot])
+            landmarks = self.landmarks[slot].copy()
+            meta = self.meta[slot].copy()
+            if int(self.sequence[slot]) == before:
+                return out_frame, landmarks, meta
+        return None
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _open_source(source):
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    return cv2.VideoCapture(source), isinstance(source, str)
+
+
+def _stream_worker(source, ring_name, frame_shape, slots, reference_file, stop_event,
+                   results_queue=None):
+    """Capture + analyze loop that runs in its own process, one per stream"""
+    from src.pose_classifier import PoseClassifier
+    from src.pose_detector import draw_pose_label
+    from src.yoga_pose_analyzer import YogaPoseAnalyzer
+
+    # One process per stream: keep OpenCV from oversubscribing the cores
+    cv2.setNumThreads(1)
+
+    ring = SharedFrameRing(frame_shape, slots, name=ring_name)
+    analyzer = YogaPoseAnalyzer(static_image_mode=False)
+    classifier = PoseClassifier(reference_file=reference_file)
+    landmarks = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+
+    cap, is_file = _open_source(source)
+    fps = 0.0
+    last_time = time.monotonic()
+    rewound = False
+
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                if is_file and cap.isOpened() and not rewound:
+                    # Loop video files so the stream stays alive
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    rewound = True
+                    continue
+                # Unreadable source, or a file that yields no frames even after rewinding
+                rewound = False
+                ring.health[HEALTH_STATE] = STATE_SOURCE_ERROR
+                ring.health[HEALTH_ERRORS] += 1
+                ring.health[HEALTH_HEARTBEAT] = time.time()
+                time.sleep(1.0)
+                cap.release()
+                cap, is_file = _open_source(source)
+                continue
+            rewound = False
+
+            processed_frame, frame_result = analyzer.analyze_frame(frame)
+
+            has_pose = frame_result.has_pose
+            if has_pose:
+                landmarks[:, :3] = frame_result.landmarks
+                landmarks[:, 3] = frame_result.visibility
+                pose_name, score = classifier.classify_frame(frame_result)
+                draw_pose_label(processed_frame, pose_name, score)
+
+            now = time.monotonic()
+            elapsed = now - last_time
+            last_time = now
+            if elapsed > 0:
+                fps = 0.9 * fps + 0.1 * (1.0 / elapsed) if fps else 1.0 / elapsed
+
+            ring.write(processed_frame, landmarks, frame_result.label_index, frame_result.score,
+                       has_pose, frame_result.captured_at)
+            ring.health[HEALTH_FPS] = fps
+            ring.health[HEALTH_FRAMES] += 1
+            ring.health[HEALTH_STATE] = STATE_RUNNING
+            ring.health[HEALTH_HEARTBEAT] = time.time()
+
+            # The parent owns the results log; never stall capture on it
+            if results_queue is not None:
+                try:
+                    results_queue.put_nowait((source, frame_result.to_record()))
+                except queue.Full:
+                    pass
+    finally:
+        cap.release()
+        ring.health[HEALTH_STATE] = STATE_STOPPED
+        ring.close()
+
+
+class MultiStreamManager:
+    """
+    Runs one capture + YogaPoseAnalyzer process per stream and aggregates
+    their output from shared memory into a grid view with health stats.
+    """
+
+    def __init__(self, sources, reference_file=None, frame_shape=(360, 480, 3), slots=4,
+                 stale_seconds=2.0, results_path=None):
+        self.sources = list(sources)
+        self.reference_file = reference_file
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.stale_seconds = stale_seconds
+        self.results_path = results_path
+        self.context = mp.get_context("spawn")
+        self.stop_event = self.context.Event()
+        self.rings = []
+        self.processes = []
+        self.pose_names = []
+        self.sink = None
+        self.results_queue = None
+        self._forwarder = None
+        self._frames = []
+
+    def start(self):
+        from src.pose_classifier import PoseClassifier
+        classifier = PoseClassifier(reference_file=self.reference_file)
+        self.pose_names = classifier.pose_names
+
+        if self.results_path:
+            self.sink = open_sink(self.results_path)
+            self.results_queue = self.context.Queue(maxsize=10000)
+            self._forwarder = threading.Thread(target=self._forward_results,
+                                               name="results-forwarder", daemon=True)
+            self._forwarder.start()
+
+        for source in self.sources:
+            ring = SharedFrameRing(self.frame_shape, self.slots, create=True)
+            process = self.context.Process(
+                target=_stream_worker,
+                args=(source, ring.name, self.frame_shape, self.slots,
+                      self.reference_file, self.stop_event, self.results_queue),
+                daemon=True
+            )
+            process.start()
+            self.rings.append(ring)
+            self.processes.append(process)
+            self._frames.append(np.zeros(self.frame_shape, dtype=np.uint8))
+
+    def stop(self):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.rings:
+            ring.close()
+            ring.unlink()
+        if self.sink:
+            self.results_queue.put(None)
+            self._forwarder.join()
+            self.sink.close()
+            self.results_queue.close()
+            self.results_queue = None
+            self._forwarder = None
+        self.rings = []
+        self.processes = []
+        self._frames = []
+
+    def _forward_results(self):
+        """Move records from the stream processes into the results sink"""
+        while True:
+            item = self.results_queue.get()
+            if item is None:
+                break
+            source, record = item
+            self.sink.publish("live", str(source), record)
+
+    def read_latest(self, index):
+        """Latest (frame, landmarks, pose name, score) for one stream, or None"""
+        latest = self.rings[index].read_latest(out_frame=self._frames[index])
+        if latest is None:
+            return None
+        frame, landmarks, meta = latest
+        label_index = int(meta[META_LABEL])
+        pose_name = self.pose_names[label_index] if label_index >= 0 else "Unknown"
+        if not meta[META_HAS_POSE]:
+            landmarks = None
+        return frame, landmarks, pose_name, float(meta[META_SCORE])
+
+    def stream_stats(self):
+        """Per-stream health and FPS"""
+        now = time.time()
+        stats = []
+        for source, ring, process in zip(self.sources, self.rings, self.processes):
+            health = ring.health.copy()
+            state = STATE_NAMES.get(int(health[HEALTH_STATE]), "unknown")
+            age = now - health[HEALTH_HEARTBEAT] if health[HEALTH_HEARTBEAT] else None
+            if not process.is_alive():
+                state = "dead"
+            elif state == "running" and age is not None and age > self.stale_seconds:
+                state = "stalled"
+            stats.append({
+                "source": source,
+                "state": state,
+                "fps": float(health[HEALTH_FPS]),
+                "frames": int(health[HEALTH_FRAMES]),
+                "errors": int(health[HEALTH_ERRORS]),
+                "heartbeat_age": age,
+            })
+        return stats
+
+    def build_grid(self):
+        """Tile the latest frame of every stream into one image"""
+        count = len(self.rings)
+        cols = math.ceil(math.sqrt(count))
+        rows = math.ceil(count / cols)
+        height, width = self.frame_shape[:2]
+        grid = np.zeros((rows * height, cols * width, 3), dtype=np.uint8)
+
+        for index, stats in enumerate(self.stream_stats()):
+            row, col = divmod(index, cols)
+            tile = grid[row * height:(row + 1) * height, col * width:(col + 1) * width]
+            latest = self.read_latest(index)
+            if latest is not None:
+                tile[:] = latest[0]
+
+            color = (0, 255, 0) if stats["state"] == "running" else (0, 0, 255)
+            cv2.putText(tile, f'[{index}] {stats["state"]} {stats["fps"]:.1f} FPS',
+                       (10, height - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+        return grid
+
+    def run_display(self, window_name='Yoga Pose Estimator - Multi Stream'):
+        """Show the grid until 'q' is pressed"""
+        try:
+            while True:
+                cv2.imshow(window_name, self.build_grid())
+                if cv2.waitKey(15) & 0xFF == ord('q'):
+                    break
+        finally:
+            cv2.destroyWindow(window_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-stream yoga pose estimation")
+    parser.add_argument("sources", nargs="+", help="Camera indices or video files")
+    parser.add_argument("--reference", default="reference_poses_weighted.json")
+    parser.add_argument("--width", type=int, default=480)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--results", help="Log every stream's per-frame results to this .jsonl/.sqlite file")
+    args = parser.parse_args()
+
+    manager = MultiStreamManager(
+        args.sources,
+        reference_file=args.reference,
+        frame_shape=(args.height, args.width, 3),
+        results_path=args.results
+    )
+    manager.start()
+    try:
+        manager.run_display()
+    finally:
+        manager.stop()
+
+
+if __name__ == "__main__":
+    main()
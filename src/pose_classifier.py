@@ -1,19 +1,193 @@
 import json
 import os
+import threading
+import numpy as np
+
+
+def mirror_joint(joint):
+    """Swap the left_/right_ prefix of a joint name"""
+    if joint.startswith("left_"):
+        return "right_" + joint[len("left_"):]
+    if joint.startswith("right_"):
+        return "left_" + joint[len("right_"):]
+    return joint
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_reference_poses(reference_poses):
+    """
+    Raise ValueError unless reference_poses has the shape
+    {pose name: {joint: angle, "_weights": {joint: weight}}}
+    """
+    if not isinstance(reference_poses, dict):
+        raise ValueError("expected an object mapping pose names to joint angles")
+    for pose_name, pose_data in reference_poses.items():
+        if not isinstance(pose_data, dict):
+            raise ValueError(f"pose '{pose_name}' must be an object of joint angles")
+        weights = pose_data.get("_weights", {})
+        if not isinstance(weights, dict):
+            raise ValueError(f"pose '{pose_name}': _weights must be an object")
+        for joint, angle in pose_data.items():
+            if joint != "_weights" and (not _is_number(angle) or not 0 <= angle <= 180):
+                raise ValueError(f"pose '{pose_name}': angle for '{joint}' must be between 0 and 180")
+        for joint, weight in weights.items():
+            if joint not in pose_data:
+                raise ValueError(f"pose '{pose_name}': weight for undefined joint '{joint}'")
+            if not _is_number(weight) or weight < 0:
+                raise ValueError(f"pose '{pose_name}': weight for '{joint}' must be a non-negative number")
+
+
+class ReferenceLibrary:
+    """
+    Reference poses precompiled into dense matrices for vectorized scoring.
+    angles and weights are (poses, joints); joints a pose does not define
+    have weight 0. mirror is the joint permutation that swaps left and right.
+    """
+
+    def __init__(self, reference_poses):
+        self.reference_poses = reference_poses
+        self.pose_names = tuple(reference_poses)
+        self.pose_index = {name: i for i, name in enumerate(self.pose_names)}
+
+        joints = set()
+        for pose_data in reference_poses.values():
+            joints.update(k for k in pose_data if k != "_weights")
+        joints.update([mirror_joint(joint) for joint in joints])
+        self.joint_names = tuple(sorted(joints))
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        self.mirror = np.array([self.joint_index[mirror_joint(j)] for j in self.joint_names], dtype=np.intp)
+
+        self.angles = np.zeros((len(self.pose_names), len(self.joint_names)), dtype=np.float32)
+        self.weights = np.zeros_like(self.angles)
+        for p, pose_data in enumerate(reference_poses.values()):
+            weights = pose_data.get("_weights", {})
+            for joint, angle in pose_data.items():
+                if joint == "_weights":
+                    continue
+                j = self.joint_index[joint]
+                self.angles[p, j] = angle
+                self.weights[p, j] = weights.get(joint, 1.0)
+
+        self._layouts = {}
+
+    def layout(self, joint_names):
+        """
+        Index map from an external joint order into the library order
+        (-1 for joints the library does not use), cached per joint order
+        """
+        layout = self._layouts.get(joint_names)
+        if layout is None:
+            layout = np.array([self.joint_index.get(j, -1) for j in joint_names], dtype=np.intp)
+            self._layouts[joint_names] = layout
+        return layout
+
+    def score(self, observed, present):
+        """
+        Weighted similarity of every reference pose against the observed
+        angle vector and its left/right mirror, in one vectorized pass.
+        Returns a (2, poses) array: row 0 as observed, row 1 mirrored.
+        """
+        candidates = np.stack((observed, observed[self.mirror]))[:, None, :]
+        weights = self.weights[None, :, :] * np.stack((present, present[self.mirror]))[:, None, :]
+
+        normalized_error = np.minimum(np.abs(candidates - self.angles[None]) / 180, 1.0)
+        total_weight = weights.sum(axis=2)
+        weighted = (weights * (1 - normalized_error)).sum(axis=2)
+        return np.divide(weighted, total_weight, out=np.zeros_like(weighted), where=total_weight > 0) * 100
+
 
 class PoseClassifier:
+    """
+    Classifies angles against a ReferenceLibrary.
+
+    The library is replaced, never mutated: reload() builds a complete new
+    ReferenceLibrary and installs it with a single attribute assignment, and
+    every classification reads self.library once. A reload can therefore run
+    on the watcher thread while frames are being classified. If the file is
+    invalid, the last good library stays active and last_error is set.
+    """
+
     def __init__(self, reference_file=None):
-        self.reference_poses = self.load_reference_poses(reference_file)
+        self.reference_file = reference_file
+        self.library = ReferenceLibrary({})
+        self.version = 0
+        self.last_error = None
+        self._signature = None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        if reference_file:
+            self.reload()
+
+    @property
+    def reference_poses(self):
+        return self.library.reference_poses
+
+    @property
+    def pose_names(self):
+        return self.library.pose_names
+
+    @property
+    def pose_index(self):
+        return self.library.pose_index
 
     def load_reference_poses(self, reference_file):
-        """Load reference poses from file or use defaults"""
-        if reference_file and os.path.exists(reference_file):
-            try:
-                with open(reference_file, 'r') as f:
-                    loaded_poses = json.load(f)
-                    return loaded_poses
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
-                print(f"Error loading {reference_file}: {e}")
+        """Load and validate reference poses, raising OSError or ValueError"""
+        with open(reference_file, 'r') as f:
+            reference_poses = json.load(f)
+        validate_reference_poses(reference_poses)
+        return reference_poses
+
+    def reload(self):
+        """
+        Parse, validate and precompile the reference file, then swap it in.
+        Returns True if a new library was installed.
+        """
+        signature = self._file_signature()
+        try:
+            library = ReferenceLibrary(self.load_reference_poses(self.reference_file))
+        except (OSError, ValueError) as e:
+            self._signature = signature
+            self.last_error = f"Error loading {self.reference_file}: {e}"
+            print(self.last_error)
+            return False
+
+        self._signature = signature
+        self.last_error = None
+        self.library = library
+        self.version += 1
+        return True
+
+    def start_watching(self, poll_interval=1.0):
+        """Reload on a background thread whenever the reference file changes"""
+        if self._watcher is not None or not self.reference_file:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(poll_interval,), name="reference-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def _watch(self, poll_interval):
+        while not self._stop_watching.wait(poll_interval):
+            if self._file_signature() != self._signature:
+                self.reload()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.reference_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
 
     def calculate_similarity(self, current_angles, ref_pose_data):
         """
@@ -54,17 +228,52 @@ class PoseClassifier:
         """
         Classify current pose based on angle similarity
         """
-        best_match = None
-        best_score = 0
-        
-        for pose_name, ref_pose_data in self.reference_poses.items():
-            score = self.calculate_similarity(current_angles, ref_pose_data)
-            if score > best_score:
-                best_score = score
-                best_match = pose_name
-        
+        pose_name, score, _ = self.match_pose(current_angles, threshold)
+        return pose_name, score
+
+    def match_pose(self, current_angles, threshold=30):
+        """
+        Classify current pose, also matching every reference against the
+        left/right mirrored angles. Returns (pose name, score, mirrored).
+        """
+        library = self.library
+        observed = np.zeros(len(library.joint_names), dtype=np.float32)
+        present = np.zeros(len(library.joint_names), dtype=np.float32)
+        for joint, angle in current_angles.items():
+            j = library.joint_index.get(joint)
+            if j is not None:
+                observed[j] = angle
+                present[j] = 1.0
+        return self._best_match(library, observed, present, threshold)
+
+    def _best_match(self, library, observed, present, threshold):
+        if not library.pose_names:
+            return "Unknown", 0, False
+
+        scores = library.score(observed, present)
+        side, index = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        best_score = float(scores[side, index])
+
         # Only return if similarity is above threshold
         if best_score > threshold:
-            return best_match, best_score
-        return "Unknown", best_score
-    
\ No newline at end of file
+            return library.pose_names[index], best_score, bool(side)
+        return "Unknown", best_score, False
+
+    def classify_frame(self, frame_result, threshold=30):
+        """
+        Classify a FrameResult in place and return (pose name, score)
+        """
+        if not frame_result.has_pose:
+            return "Unknown", 0
+        library = self.library
+        layout = library.layout(frame_result.joint_names)
+        used = layout >= 0
+
+        observed = np.zeros(len(library.joint_names), dtype=np.float32)
+        present = np.zeros(len(library.joint_names), dtype=np.float32)
+        observed[layout[used]] = frame_result.angles[used]
+        present[layout[used]] = 1.0
+
+        pose_name, score, mirrored = self._best_match(library, observed, present, threshold)
+        frame_result.set_label(library.pose_names, library.pose_index.get(pose_name, -1), score, mirrored)
+        return pose_name, score
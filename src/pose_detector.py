@@ -4,17 +4,22 @@ import numpy as np
 from mediapipe.framework.formats import landmark_pb2
 
 class PoseDetector:
-    def __init__(self, static_image_mode=False, model_complexity=2, smooth_landmarks=True):
+    def __init__(self, static_image_mode=False, model_complexity=2, smooth_landmarks=True,
+                 min_detection_confidence=0.6, min_tracking_confidence=0.6):
         self.mp_pose = mp.solutions.pose
         self.mp_draw = mp.solutions.drawing_utils
         self.pose = self.mp_pose.Pose(
             static_image_mode=static_image_mode,
             model_complexity=model_complexity,
             smooth_landmarks=smooth_landmarks,
-            min_detection_confidence=0.6,
-            min_tracking_confidence=0.6
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
         )
     
+    def close(self):
+        """Release the MediaPipe graph"""
+        self.pose.close()
+
     def detect_pose(self, image, draw=True, keypoints_only=False):
         """
         Detect pose landmarks in the image
@@ -22,7 +27,16 @@ class PoseDetector:
         rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
         results = self.pose.process(rgb_image)
         
-        if results.pose_landmarks and draw:
+        if draw:
+            image = self.draw_pose(image, results, keypoints_only)
+        
+        return image, results
+    
+    def draw_pose(self, image, results, keypoints_only=False):
+        """
+        Draw pose landmarks from previously computed results
+        """
+        if results.pose_landmarks:
             if keypoints_only:
                 keypoint_indices = [
                     11, 12, 13, 14, 15, 16, 19, 20, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32
@@ -71,7 +85,7 @@ class PoseDetector:
                     self.mp_draw.DrawingSpec(color=(255, 255, 255), thickness=2, circle_radius=2)
                 )
         
-        return image, results
+        return image
     
     def get_landmark_coordinates(self, results, image_shape):
         """
@@ -89,6 +103,16 @@ class PoseDetector:
         return np.array(landmarks)
 
 
+def draw_pose_label(image, pose_name, confidence):
+    """
+    Draw the pose name and confidence overlay in the top-left corner
+    """
+    cv2.putText(image, f'Pose: {pose_name}', (10, 30), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    cv2.putText(image, f'Confidence: {confidence:.1f}%', (10, 60), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    return image
+
 def calculate_angle(point1, point2, point3):
     """
     Calculate angle between three points
@@ -138,4 +162,24 @@ def calculate_angle_3d(point1, point2, point3):
     cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
     angle = np.degrees(np.arccos(cosine_angle))
 
-    return angle
\ No newline at end of file
+    return angle
+
+def calculate_angles_3d(landmarks, joint_indices):
+    """
+    Vectorized calculate_angle_3d for many joints at once
+    landmarks: (N, 3) array of [x, y, z] coordinates
+    joint_indices: (J, 3) integer array of landmark triples
+    Returns (J,) float32 array of angles in degrees
+    """
+    vector1 = landmarks[joint_indices[:, 0]] - landmarks[joint_indices[:, 1]]
+    vector2 = landmarks[joint_indices[:, 2]] - landmarks[joint_indices[:, 1]]
+
+    dot_product = np.einsum('ij,ij->i', vector1, vector2)
+    magnitudes = np.linalg.norm(vector1, axis=1) * np.linalg.norm(vector2, axis=1)
+
+    # Avoid division by zero: degenerate joints get angle 0 like calculate_angle_3d
+    valid = magnitudes > 0
+    cosine_angle = np.divide(dot_product, magnitudes, out=np.ones_like(dot_product), where=valid)
+    angles = np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+    angles[~valid] = 0
+    return angles.astype(np.float32, copy=False)
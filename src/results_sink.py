@@ -0,0 +1,283 @@
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class ResultsSink:
+    """
+    Append-only results log written in batches by a background thread.
+
+    publish() only enqueues, so the inference loop never touches the disk.
+    FrameResult objects are converted to records on the writer thread. When
+    the queue is full the record is dropped and counted rather than
+    blocking the caller. Subclasses implement _open, _write_batch and _close.
+    """
+
+    def __init__(self, path, session=None, batch_size=200, flush_interval=1.0, queue_size=10000):
+        self.path = path
+        self.session = session or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="results-sink", daemon=True)
+        self._thread.start()
+
+    def publish(self, mode, source, result):
+        """
+        Queue one per-frame or per-image result without blocking.
+        result is a FrameResult or an already JSON-serializable dict.
+        Returns False if the record was dropped.
+        """
+        if self._closed:
+            return False
+        try:
+            self.queue.put_nowait((mode, source, result))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self):
+        """Flush everything queued and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(None)
+        self._thread.join()
+
+    def _record(self, mode, source, result):
+        record = result.to_record() if hasattr(result, "to_record") else dict(result)
+        record["session"] = self.session
+        record["mode"] = mode
+        record["source"] = source
+        return record
+
+    def _run(self):
+        try:
+            self._open()
+        except Exception as e:
+            self.error = str(e)
+
+        try:
+            self._drain()
+        finally:
+            # Also after a failed open or write, so no file or connection leaks
+            try:
+                self._close()
+            except Exception as e:
+                if self.error is None:
+                    self.error = str(e)
+
+    def _drain(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self.queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(self._record(*item))
+            except queue.Empty:
+                pass
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                if self.error is None:
+                    try:
+                        self._write_batch(batch)
+                        self.written += len(batch)
+                    except Exception as e:
+                        self.error = str(e)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def stats(self):
+        return {
+            "session": self.session,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+            "error": self.error,
+        }
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class JsonlSink(ResultsSink):
+    """One JSON record per line, rotated to path.1, path.2, ... at max_bytes"""
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backup_count=10, **kwargs):
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        super().__init__(path, **kwargs)
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _write_batch(self, records):
+        self._file.write("".join(json.dumps(record) + "\n" for record in records))
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class SqliteSink(ResultsSink):
+    """SQLite in WAL mode, one transaction per batch"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY,
+            session TEXT NOT NULL,
+            mode TEXT,
+            source TEXT,
+            captured_at REAL,
+            pose TEXT,
+            score REAL,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_session ON results (session, captured_at);
+    """
+
+    def __init__(self, path, **kwargs):
+        self._connection = None
+        super().__init__(path, **kwargs)
+
+    def _open(self):
+        # The connection lives on the writer thread only
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(self.SCHEMA)
+
+    def _write_batch(self, records):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO results (session, mode, source, captured_at, pose, score, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (r["session"], r["mode"], r["source"], r.get("captured_at"),
+                     r.get("pose"), r.get("score"), json.dumps(r))
+                    for r in records
+                ]
+            )
+
+    def _close(self):
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+
+def open_sink(path, **kwargs):
+    """Create a sink for path: .sqlite/.db use SQLite, anything else JSONL"""
+    if _is_sqlite(path):
+        return SqliteSink(path, **kwargs)
+    return JsonlSink(path, **kwargs)
+
+
+def _is_sqlite(path):
+    return os.path.splitext(path)[1].lower() in (".sqlite", ".sqlite3", ".db")
+
+
+def _jsonl_files(path):
+    """Rotated files hold older records: path.N ... path.1, then path"""
+    backups = []
+    for name in glob.glob(glob.escape(path) + ".*"):
+        suffix = name.rsplit(".", 1)[1]
+        if suffix.isdigit():
+            backups.append((int(suffix), name))
+    return [name for _, name in sorted(backups, reverse=True)] + [path]
+
+
+def load_records(path, session=None, mode=None):
+    """
+    Read logged records back, oldest first, optionally filtered by session
+    and mode. Safe to call while a sink is still writing: a JSONL line that
+    is still being written is skipped, and so is a file rotated away while
+    reading (its records may then be missed).
+    """
+    if _is_sqlite(path):
+        query = "SELECT record FROM results"
+        clauses, params = [], []
+        if session:
+            clauses.append("session = ?")
+            params.append(session)
+        if mode:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id"
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return [json.loads(row[0]) for row in connection.execute(query, params)]
+        finally:
+            connection.close()
+
+    records = []
+    for file_path in _jsonl_files(path):
+        try:
+            f = open(file_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            continue
+        with f:
+            for line in f:
+                # The writer may be part way through the last line
+                if not line.endswith("\n") or not line.strip():
+                    continue
+                record = json.loads(line)
+                if session and record.get("session") != session:
+                    continue
+                if mode and record.get("mode") != mode:
+                    continue
+                records.append(record)
+    return records
+
+
+def list_sessions(path):
+    """Session ids in a results log with their record counts"""
+    if _is_sqlite(path):
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return dict(connection.execute(
+                "SELECT session, COUNT(*) FROM results GROUP BY session ORDER BY MIN(id)"
+            ))
+        finally:
+            connection.close()
+
+    counts = {}
+    for record in load_records(path):
+        counts[record["session"]] = counts.get(record["session"], 0) + 1
+    return counts
@@ -0,0 +1,370 @@
+import json
+import os
+import numpy as np
+
+from src.pose_classifier import mirror_joint
+
+
+class SequenceMatcher:
+    """
+    Recognize pose sequences (flows such as Surya Namaskar) in a streaming
+    angle timeline, while the student is still part way through them.
+    Like the pose classifier, every step is also matched against the
+    left/right mirrored angles, so one-sided poses may be done on either
+    side (and switch sides between steps, as in Surya Namaskar).
+
+    Frames are averaged into fixed-interval samples kept in a ring buffer.
+    The sample clock keeps running while no pose is detected, so time
+    spent out of frame still counts towards the lag. Every reference flow
+    is expanded to the same sample rate from the reference pose library.
+    The recent timeline is aligned against each flow with subsequence DTW.
+    The path may start and end anywhere in the flow, so its end is the
+    student's current position. Samples before the path starts (time
+    before the flow began) are skipped at a fixed cost, that of a sample
+    matched exactly at min_score. A flow is only recognized once the path
+    crosses a step boundary and the new step was held for confirm_seconds,
+    since holding one pose fits every flow that contains it. After that,
+    holding the current step keeps the match.
+
+    The Sakoe-Chiba band takes the form that suits an open-begin alignment.
+    Instead of a fixed diagonal, every step must occupy between
+    1/band_ratio and band_ratio times its length in samples. The first
+    step of the path may be partial, and the final pose may be held as
+    long as the student likes.
+
+    Flows are ranked by an LB_Keogh bound. Every sample is compared with
+    the per-joint envelope of the flow's step poses, mirrored or not,
+    using the smallest weight of each joint, and the result is capped at
+    the skip cost. Once a bound cannot beat the best flow so far, all
+    remaining flows are pruned. Otherwise the step cost matrix is built
+    and checked against a tighter bound: the nearest step pose per sample.
+    DTW rows use a cumulative-minimum recurrence, so there is no Python
+    loop over columns. An alignment is abandoned once a row, and skipping
+    past it, both exceed the best distance. That is valid because every
+    path either matches the row or starts after it.
+    """
+
+    def __init__(self, reference_poses, flows, joint_names, sample_interval=0.5,
+                 window_steps=2, band_ratio=2.0, min_score=90.0, confirm_seconds=1.0):
+        self.joint_names = tuple(joint_names)
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        self.mirror = np.array(
+            [self.joint_index.get(mirror_joint(j), i) for i, j in enumerate(self.joint_names)],
+            dtype=np.intp
+        )
+        self.sample_interval = sample_interval
+        self.window_steps = window_steps
+        self.band_ratio = band_ratio
+        self.min_score = min_score
+        self.confirm_samples = max(1, int(np.ceil(confirm_seconds / sample_interval)))
+        # A skipped sample costs as much as one matched at the score threshold
+        self.skip_cost = (1.0 - min_score / 100.0) ** 2
+        self.flows = [self._compile_flow(name, flow, reference_poses) for name, flow in flows.items()]
+
+        # Every flow sees the same window, so distances are comparable
+        self.capacity = max(
+            (window_steps * flow["samples_per_step"] for flow in self.flows), default=2
+        )
+        self.reset()
+
+    def reset(self):
+        """Clear the timeline"""
+        num_joints = len(self.joint_names)
+        self._ring = np.zeros((self.capacity, num_joints), dtype=np.float32)
+        self._ticks = np.zeros(self.capacity, dtype=np.int64)
+        self._head = 0
+        self._size = 0
+        self._tick = 0
+        self._bucket_start = None
+        self._bucket_sum = np.zeros(num_joints, dtype=np.float64)
+        self._bucket_count = 0
+        self._anchor = None
+        self.pruned = 0
+        self.abandoned = 0
+
+    def _compile_flow(self, name, flow, reference_poses):
+        step_seconds = flow.get("step_seconds", 4.0)
+        samples_per_step = max(1, int(round(step_seconds / self.sample_interval)))
+        angles = np.zeros((len(flow["steps"]), len(self.joint_names)), dtype=np.float32)
+        weights = np.zeros_like(angles)
+
+        for step, pose_name in enumerate(flow["steps"]):
+            if pose_name not in reference_poses:
+                raise ValueError(f"Flow '{name}' uses unknown pose '{pose_name}'")
+            pose = reference_poses[pose_name]
+            pose_weights = pose.get("_weights", {})
+            for joint, angle in pose.items():
+                index = self.joint_index.get(joint)
+                if index is not None:
+                    angles[step, index] = angle / 180.0
+                    weights[step, index] = pose_weights.get(joint, 1.0)
+            if weights[step].sum() > 0:
+                weights[step] /= weights[step].sum()
+
+        # Steps are constant over their samples, so costs are computed per step
+        # and expanded with step_of_sample
+        step_of_sample = np.repeat(np.arange(len(flow["steps"])), samples_per_step)
+        min_rows = max(1, int(np.ceil(samples_per_step / self.band_ratio)))
+
+        # LB_Keogh envelope over the step poses and their mirror images
+        both_angles = np.concatenate((angles, angles[:, self.mirror]))
+        both_weights = np.concatenate((weights, weights[:, self.mirror]))
+        return {
+            "name": name,
+            "steps": list(flow["steps"]),
+            "samples_per_step": samples_per_step,
+            "step_of_sample": step_of_sample,
+            "min_rows": min_rows,
+            "max_rows": max(min_rows, int(samples_per_step * self.band_ratio)),
+            "angles": angles,
+            "weights": weights,
+            "lower": both_angles.min(axis=0),
+            "upper": both_angles.max(axis=0),
+            "envelope_weights": both_weights.min(axis=0),
+        }
+
+    @classmethod
+    def from_files(cls, reference_poses, flows_file, joint_names, **kwargs):
+        """Build a matcher from a flows JSON file ({name: {"steps": [...], "step_seconds": n}})"""
+        flows = {}
+        if flows_file and os.path.exists(flows_file):
+            with open(flows_file, 'r') as f:
+                flows = json.load(f)
+        return cls(reference_poses, flows, joint_names, **kwargs)
+
+    def update(self, timestamp, angles):
+        """
+        Add one frame's angle vector (ordered like joint_names).
+        Returns True when a new timeline sample was completed.
+        """
+        if self._bucket_start is None:
+            self._bucket_start = timestamp
+
+        completed = False
+        elapsed = int((timestamp - self._bucket_start) / self.sample_interval)
+        if elapsed > 0:
+            if self._bucket_count:
+                self._push(self._bucket_sum / self._bucket_count)
+                self._bucket_sum[:] = 0
+                self._bucket_count = 0
+                completed = True
+            # Advance on the sample grid so late frames do not stretch the
+            # timeline; intervals without a pose leave no sample but still
+            # move the clock
+            self._bucket_start += self.sample_interval * elapsed
+            self._tick += elapsed
+
+        if angles is not None:
+            self._bucket_sum += angles
+            self._bucket_count += 1
+        return completed
+
+    def update_frame(self, frame_result):
+        """Add one FrameResult (frames without a pose only advance time)"""
+        angles = frame_result.angles
+        if angles is not None and frame_result.joint_names != self.joint_names:
+            angles = np.array([frame_result.angle_dict().get(j, 0.0) for j in self.joint_names])
+        return self.update(frame_result.captured_mono, angles)
+
+    def _push(self, vector):
+        slot = (self._head + self._size) % self.capacity
+        self._ring[slot] = vector / 180.0
+        self._ticks[slot] = self._tick
+        if self._size == self.capacity:
+            self._head = (self._head + 1) % self.capacity
+        else:
+            self._size += 1
+
+    def _recent(self, count):
+        slots = (self._head + self._size - count + np.arange(count)) % self.capacity
+        return self._ring[slots], self._ticks[slots]
+
+    def _envelope_bound(self, query, flow):
+        """LB_Keogh: per sample, the cheaper of the flow envelope and the skip cost"""
+        excess = np.maximum(query - flow["upper"], flow["lower"] - query)
+        np.maximum(excess, 0.0, out=excess)
+        costs = (excess * excess) @ flow["envelope_weights"]
+        return float(np.minimum(costs, self.skip_cost).sum())
+
+    def _step_costs(self, query, flow):
+        """
+        Weighted squared error of every query sample against every step
+        pose, taking the better of the observed and mirrored angles
+        """
+        candidates = np.stack((query, query[:, self.mirror]))
+        diff = candidates[:, :, None, :] - flow["angles"][None, None, :, :]
+        return np.sum(flow["weights"][None, None] * diff * diff, axis=3).min(axis=0)
+
+    def _align(self, flow, step_costs, abandon_at, anchored_step):
+        """
+        Banded subsequence DTW of the query against the flow, abandoned once
+        a row exceeds abandon_at. Returns (distance, end position, row where
+        the path entered the current step), or None.
+
+        The band depends on how long the path has been in its current step,
+        so that run length is part of the DP state: dtw[r, j] is the best
+        path ending in column j whose step has occupied r + 1 samples. Row
+        i only has runs up to i + 1.
+        """
+        step_of_sample = flow["step_of_sample"]
+        steps, width = len(flow["steps"]), flow["samples_per_step"]
+        cost = step_costs[:, step_of_sample]
+        m, n = cost.shape
+        columns = np.arange(n)
+        boundaries = columns[1:][step_of_sample[1:] != step_of_sample[:-1]]
+        runs = np.arange(1, m + 1)[:, None]
+        # Every step but the final pose may occupy at most max_rows samples
+        can_hold = runs < np.where(step_of_sample == steps - 1, m, flow["max_rows"])
+        can_leave = runs >= flow["min_rows"]
+        dtw = start = None
+
+        for i in range(m):
+            entry = np.full((i + 1, n), np.inf)
+            entry_start = np.zeros((i + 1, n), dtype=np.intp)
+            # Open begin: start fresh at any position, paying skip_cost for
+            # every earlier sample (time before the flow started)
+            entry[0] = i * self.skip_cost
+            entry_start[0] = columns
+            if i:
+                # Stay in the step one more sample, in place or one column on
+                held = np.where(can_hold[:i], dtw, np.inf)
+                diagonal = np.full((i, n), np.inf)
+                diagonal[:, 1:] = held[:, :-1]
+                diagonal[:, boundaries] = np.inf
+                diagonal_start = np.zeros((i, n), dtype=np.intp)
+                diagonal_start[:, 1:] = start[:, :-1]
+                use_diagonal = diagonal <= held
+                entry[1:] = np.where(use_diagonal, diagonal, held)
+                entry_start[1:] = np.where(use_diagonal, diagonal_start, start)
+
+                # Into the next step once the last one lasted min_rows samples,
+                # or at any time if the path started there and saw part of it
+                started_there = step_of_sample[start[:, boundaries - 1]] == step_of_sample[boundaries - 1]
+                leaving = np.where(can_leave[:i] | started_there, dtw[:, boundaries - 1], np.inf)
+                run = leaving.argmin(axis=0)
+                left = leaving[run, np.arange(len(boundaries))]
+                continued = left <= entry[0, boundaries]
+                entry[0, boundaries] = np.where(continued, left, entry[0, boundaries])
+                entry_start[0, boundaries] = np.where(
+                    continued, start[run, boundaries - 1], entry_start[0, boundaries]
+                )
+
+            # Horizontal moves within each step keep the run length:
+            # D[j] = C[j] + min_{k<=j}(entry[k] - C[k-1])
+            row_cost = cost[i].reshape(steps, width)
+            cumulative = np.cumsum(row_cost, axis=1)
+            offset = entry.reshape(i + 1, steps, width) - (cumulative - row_cost)
+            running = np.minimum.accumulate(offset, axis=2)
+            # Column each running minimum came from, to carry the path start along
+            is_new = np.concatenate(
+                (np.ones((i + 1, steps, 1), dtype=bool), offset[:, :, 1:] < running[:, :, :-1]),
+                axis=2
+            )
+            origin = np.maximum.accumulate(
+                np.where(is_new, columns.reshape(steps, width), 0), axis=2
+            ).reshape(i + 1, n)
+            dtw = (cumulative + running).reshape(i + 1, n)
+            start = entry_start[np.arange(i + 1)[:, None], origin]
+
+            # Every path either matches this row or starts after it
+            if min(dtw.min(), (i + 1) * self.skip_cost) >= abandon_at:
+                return None
+
+        # Open end, but the path must cross a step boundary unless it stays
+        # in the step the student was already matched to
+        valid = step_of_sample[start] < step_of_sample
+        if anchored_step is None:
+            valid &= runs >= self.confirm_samples
+        else:
+            valid |= step_of_sample == anchored_step
+        final = np.where(valid, dtw, np.inf)
+        run = final.argmin(axis=0)
+        final = final[run, columns]
+        # Prefer the furthest position on ties
+        position = n - 1 - int(np.argmin(final[::-1]))
+        if final[position] == np.inf:
+            return None
+        return float(final[position]), position, m - 1 - int(run[position])
+
+    def match(self):
+        """
+        Best matching flow for the recent timeline, or None.
+        Returns dict with flow name, score, current step and lag.
+        """
+        if self._size < 2:
+            return None
+
+        query, ticks = self._recent(self._size)
+        rows = len(query)
+        candidates = sorted(
+            ((self._envelope_bound(query, flow) / rows, flow) for flow in self.flows),
+            key=lambda item: item[0]
+        )
+
+        anchor_flow = self._anchor["flow"] if self._anchor else None
+        anchor_step = self._anchor["step"] if self._anchor else None
+        best_distance, best = np.inf, None
+        for rank, (bound, flow) in enumerate(candidates):
+            if bound >= best_distance:
+                # Sorted by bound: no remaining flow can beat the best one
+                self.pruned += len(candidates) - rank
+                break
+            step_costs = self._step_costs(query, flow)
+            # Each sample is matched to some step or skipped before the flow
+            if float(np.minimum(step_costs.min(axis=1), self.skip_cost).sum()) / rows >= best_distance:
+                self.pruned += 1
+                continue
+            alignment = self._align(
+                flow, step_costs, best_distance * rows,
+                anchor_step if flow["name"] == anchor_flow else None
+            )
+            if alignment is None:
+                self.abandoned += 1
+                continue
+            distance = alignment[0] / rows
+            if distance < best_distance:
+                best_distance, best = distance, (flow, alignment)
+
+        if best is None:
+            return None
+        score = max(0.0, 1.0 - float(np.sqrt(best_distance))) * 100
+        if score < self.min_score:
+            return None
+
+        flow, (_, position, entered_row) = best
+        step = int(flow["step_of_sample"][position])
+        return {
+            "flow": flow["name"],
+            "score": score,
+            "step": step,
+            "step_name": flow["steps"][step],
+            "total_steps": len(flow["steps"]),
+            "lag_seconds": self._lag(flow, step, int(ticks[entered_row]), int(ticks[-1]) + 1),
+        }
+
+    def _lag(self, flow, step, entered, now):
+        """
+        Seconds behind (positive) or ahead of the flow tempo since the flow
+        was first recognized. entered is the sample tick at which the
+        student reached the current step and now the tick after the latest
+        sample.
+        """
+        anchor = self._anchor
+        if anchor is None or anchor["flow"] != flow["name"] or step < anchor["step"]:
+            anchor = self._anchor = {
+                "flow": flow["name"], "first_step": step, "first_entered": entered,
+                "step": step, "entered": entered,
+            }
+        elif step == anchor["step"]:
+            # Once a long hold fills the window the entry row slides with it
+            entered = anchor["entered"] = min(anchor["entered"], entered)
+        else:
+            anchor["step"], anchor["entered"] = step, entered
+
+        samples_per_step = flow["samples_per_step"]
+        lag = (entered - anchor["first_entered"]) - (step - anchor["first_step"]) * samples_per_step
+        # Holding the current step longer than the tempo also counts, except
+        # for the final pose, which the student may hold as long as they like
+        if step < len(flow["steps"]) - 1:
+            lag += max(0, now - entered - samples_per_step)
+        return lag * self.sample_interval
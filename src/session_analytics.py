@@ -0,0 +1,246 @@
+import time
+import numpy as np
+
+
+class SessionAnalytics:
+    """
+    Incremental session statistics fed one classified frame at a time.
+
+    Every update is O(1): per-joint angles go into a fixed-size ring buffer
+    with running sums for the rolling stability window, whole-session joint
+    statistics use Welford's algorithm, and pose holds are tracked as runs.
+    Memory is bounded by the ring capacity and the number of distinct poses.
+    """
+
+    NO_POSE = "No Pose"
+
+    def __init__(self, joint_names, window_seconds=10.0, capacity=600, min_hold_seconds=1.0):
+        self.joint_names = tuple(joint_names)
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.min_hold_seconds = min_hold_seconds
+        self.reset()
+
+    def reset(self):
+        """Clear all accumulated statistics"""
+        num_joints = len(self.joint_names)
+        self._full_mask = np.ones(num_joints, dtype=bool)
+
+        # Rolling window: ring buffer of angle vectors plus running sums
+        self._ring = np.zeros((self.capacity, num_joints), dtype=np.float64)
+        self._ring_mask = np.zeros((self.capacity, num_joints), dtype=bool)
+        self._ring_times = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0
+        self._size = 0
+        self._window_sum = np.zeros(num_joints, dtype=np.float64)
+        self._window_sq_sum = np.zeros(num_joints, dtype=np.float64)
+        self._window_count = np.zeros(num_joints, dtype=np.int64)
+        self._updates_since_resum = 0
+
+        # Whole-session per-joint statistics (Welford)
+        self._count = np.zeros(num_joints, dtype=np.int64)
+        self._mean = np.zeros(num_joints, dtype=np.float64)
+        self._m2 = np.zeros(num_joints, dtype=np.float64)
+
+        # Run-length tracking of pose holds
+        self.session_start = None
+        self.last_timestamp = None
+        self.frame_count = 0
+        self.current_pose = None
+        self.current_start = None
+        self.pose_stats = {}
+
+    def update(self, angles, pose_name, confidence=0.0, timestamp=None):
+        """
+        Add one classified frame.
+        angles: dict of joint name -> angle (may be empty when no pose is detected)
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.session_start is None:
+            self.session_start = timestamp
+        if not angles:
+            pose_name = self.NO_POSE
+
+        self._update_runs(pose_name, confidence, timestamp)
+        if angles:
+            self._update_joints(*self._vectorize(angles), timestamp)
+        self._finish_update(timestamp)
+
+    def update_frame(self, frame_result):
+        """
+        Add one classified FrameResult. Its angle vector is used directly when
+        the joint order matches, so no per-frame dict is built.
+        """
+        timestamp = frame_result.captured_mono
+        if self.session_start is None:
+            self.session_start = timestamp
+
+        if not frame_result.has_pose:
+            self._update_runs(self.NO_POSE, 0.0, timestamp)
+        else:
+            self._update_runs(frame_result.pose_name, frame_result.score, timestamp)
+            if frame_result.joint_names == self.joint_names:
+                self._update_joints(frame_result.angles, self._full_mask, timestamp)
+            else:
+                self._update_joints(*self._vectorize(frame_result.angle_dict()), timestamp)
+        self._finish_update(timestamp)
+
+    def _finish_update(self, timestamp):
+        self._evict(timestamp)
+        self.last_timestamp = timestamp
+        self.frame_count += 1
+
+    def _update_runs(self, pose_name, confidence, timestamp):
+        if self.last_timestamp is not None and self.current_pose is not None:
+            # Credit the elapsed interval to the pose that was showing
+            stats = self.pose_stats[self.current_pose]
+            stats["dwell"] += timestamp - self.last_timestamp
+
+        if pose_name != self.current_pose:
+            self._close_run(timestamp)
+            self.current_pose = pose_name
+            self.current_start = timestamp
+            self.pose_stats.setdefault(
+                pose_name, {"dwell": 0.0, "longest_hold": 0.0, "holds": 0, "frames": 0, "confidence": 0.0}
+            )
+
+        stats = self.pose_stats[pose_name]
+        stats["frames"] += 1
+        stats["confidence"] += float(confidence)
+        stats["longest_hold"] = max(stats["longest_hold"], timestamp - self.current_start)
+
+    def _close_run(self, timestamp):
+        if self.current_pose is None:
+            return
+        if timestamp - self.current_start >= self.min_hold_seconds:
+            self.pose_stats[self.current_pose]["holds"] += 1
+
+    def _vectorize(self, angles):
+        vector = np.zeros(len(self.joint_names), dtype=np.float64)
+        mask = np.zeros(len(self.joint_names), dtype=bool)
+        for joint, angle in angles.items():
+            index = self.joint_index.get(joint)
+            if index is not None:
+                vector[index] = angle
+                mask[index] = True
+        return vector, mask
+
+    def _update_joints(self, vector, mask, timestamp):
+        # Welford update for the joints present in this frame
+        self._count += mask
+        delta = np.where(mask, vector - self._mean, 0.0)
+        self._mean += np.divide(delta, self._count, out=np.zeros_like(delta), where=mask)
+        self._m2 += np.where(mask, delta * (vector - self._mean), 0.0)
+
+        # Overwrite the oldest slot when the ring is full
+        if self._size == self.capacity:
+            self._drop_oldest()
+        slot = (self._head + self._size) % self.capacity
+        self._ring[slot] = vector
+        self._ring_mask[slot] = mask
+        self._ring_times[slot] = timestamp
+        self._size += 1
+
+        self._window_sum += np.where(mask, vector, 0.0)
+        self._window_sq_sum += np.where(mask, vector * vector, 0.0)
+        self._window_count += mask
+
+        # Periodically recompute the sums to cancel floating point drift
+        self._updates_since_resum += 1
+        if self._updates_since_resum >= self.capacity:
+            self._resum()
+
+    def _drop_oldest(self):
+        slot = self._head
+        mask = self._ring_mask[slot]
+        vector = self._ring[slot]
+        self._window_sum -= np.where(mask, vector, 0.0)
+        self._window_sq_sum -= np.where(mask, vector * vector, 0.0)
+        self._window_count -= mask
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+
+    def _evict(self, timestamp):
+        """Drop samples older than the rolling window (amortized O(1))"""
+        cutoff = timestamp - self.window_seconds
+        while self._size and self._ring_times[self._head] < cutoff:
+            self._drop_oldest()
+
+    def _resum(self):
+        slots = (self._head + np.arange(self._size)) % self.capacity
+        mask = self._ring_mask[slots]
+        values = np.where(mask, self._ring[slots], 0.0)
+        self._window_sum = values.sum(axis=0)
+        self._window_sq_sum = (values * values).sum(axis=0)
+        self._window_count = mask.sum(axis=0).astype(np.int64)
+        self._updates_since_resum = 0
+
+    def joint_stability(self):
+        """
+        Per-joint mean and standard deviation over the rolling window.
+        Returns dict of joint name -> (mean, std) for joints seen in the window.
+        """
+        stability = {}
+        for i, joint in enumerate(self.joint_names):
+            count = self._window_count[i]
+            if count == 0:
+                continue
+            mean = self._window_sum[i] / count
+            variance = max(self._window_sq_sum[i] / count - mean * mean, 0.0)
+            stability[joint] = (float(mean), float(np.sqrt(variance)))
+        return stability
+
+    def session_joint_stats(self):
+        """Per-joint mean and standard deviation over the whole session"""
+        stats = {}
+        for i, joint in enumerate(self.joint_names):
+            count = self._count[i]
+            if count == 0:
+                continue
+            variance = self._m2[i] / (count - 1) if count > 1 else 0.0
+            stats[joint] = (float(self._mean[i]), float(np.sqrt(variance)))
+        return stats
+
+    def current_hold(self):
+        """Return (pose name, seconds held) for the ongoing run"""
+        if self.current_pose is None:
+            return None, 0.0
+        return self.current_pose, self.last_timestamp - self.current_start
+
+    def summary(self):
+        """JSON-serializable snapshot of the session statistics"""
+        pose_name, hold = self.current_hold()
+        duration = 0.0
+        if self.session_start is not None:
+            duration = self.last_timestamp - self.session_start
+
+        poses = {}
+        for name, stats in self.pose_stats.items():
+            holds = stats["holds"]
+            if name == self.current_pose and hold >= self.min_hold_seconds:
+                holds += 1
+            poses[name] = {
+                "dwell_seconds": round(stats["dwell"], 3),
+                "longest_hold_seconds": round(stats["longest_hold"], 3),
+                "holds": holds,
+                "mean_confidence": round(stats["confidence"] / stats["frames"], 2),
+            }
+
+        return {
+            "duration_seconds": round(duration, 3),
+            "frames": self.frame_count,
+            "current_pose": pose_name,
+            "current_hold_seconds": round(hold, 3),
+            "poses": poses,
+            "window_seconds": self.window_seconds,
+            "joint_stability": {
+                joint: {"mean": round(mean, 2), "std": round(std, 2)}
+                for joint, (mean, std) in self.joint_stability().items()
+            },
+            "session_joints": {
+                joint: {"mean": round(mean, 2), "std": round(std, 2)}
+                for joint, (mean, std) in self.session_joint_stats().items()
+            },
+        }
@@ -0,0 +1,397 @@
+import argparse
+import gc
+import glob
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+DEMO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "demos")
+
+
+class DemoImageSource:
+    """
+    Camera stand-in that cycles through photos of real poses, so the
+    detector finds a person and the whole live path (classification,
+    analytics, flow matching, results text) runs. Each photo is held for
+    hold_seconds and shifted by a few pixels every frame, so the motion gate
+    sees camera-like jitter rather than a frozen image.
+    """
+
+    def __init__(self, paths, width=640, height=480, fps=30.0, hold_seconds=4.0, jitter=4, seed=0):
+        self.fps = fps
+        self.hold_frames = max(1, int(hold_seconds * fps))
+        self.jitter = jitter
+        self.index = 0
+        self.rng = np.random.default_rng(seed)
+        self.frames = [self._letterbox(path, width, height) for path in paths]
+        if not self.frames:
+            raise ValueError("No demo images to play")
+
+    @classmethod
+    def from_directory(cls, directory=DEMO_DIR, **kwargs):
+        # app.png is a screenshot of the GUI, not a pose
+        paths = sorted(
+            path for path in glob.glob(os.path.join(directory, "*"))
+            if path.lower().endswith((".jpg", ".jpeg", ".png")) and os.path.basename(path) != "app.png"
+        )
+        return cls(paths, **kwargs)
+
+    @staticmethod
+    def _letterbox(path, width, height):
+        image = cv2.imread(path)
+        if image is None:
+            raise ValueError(f"Could not load image {path}")
+        scale = min(width / image.shape[1], height / image.shape[0])
+        resized = cv2.resize(image, (int(image.shape[1] * scale), int(image.shape[0] * scale)))
+        frame = np.full((height, width, 3), 255, dtype=np.uint8)
+        top = (height - resized.shape[0]) // 2
+        left = (width - resized.shape[1]) // 2
+        frame[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+        return frame
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0
+
+    def read(self):
+        frame = self.frames[(self.index // self.hold_frames) % len(self.frames)]
+        self.index += 1
+        dx, dy = self.rng.integers(-self.jitter, self.jitter + 1, size=2)
+        shift = np.float32([[1, 0, dx], [0, 1, dy]])
+        return True, cv2.warpAffine(frame, shift, (frame.shape[1], frame.shape[0]),
+                                    borderMode=cv2.BORDER_REPLICATE)
+
+    def release(self):
+        pass
+
+
+class SyntheticSource:
+    """
+    Camera stand-in that renders a moving stick figure. Pose detectors
+    rarely find a person in it, so it only exercises the no-pose path.
+    """
+
+    def __init__(self, width=640, height=480, fps=30.0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.index = 0
+        self._background = np.full((height, width, 3), 40, dtype=np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0
+
+    def read(self):
+        frame = self._background.copy()
+        t = self.index / self.fps
+        self.index += 1
+
+        cx, cy = self.width // 2, self.height // 2
+        sway = int(40 * np.sin(t))
+        arm = int(60 * np.sin(t * 0.5))
+        head, hip = (cx + sway, cy - 150), (cx + sway, cy + 20)
+        shoulder = (cx + sway, cy - 100)
+        cv2.circle(frame, head, 25, (200, 200, 200), -1)
+        cv2.line(frame, shoulder, hip, (200, 200, 200), 12)
+        cv2.line(frame, shoulder, (shoulder[0] - 90, shoulder[1] - arm), (200, 200, 200), 10)
+        cv2.line(frame, shoulder, (shoulder[0] + 90, shoulder[1] - arm), (200, 200, 200), 10)
+        cv2.line(frame, hip, (hip[0] - 50, cy + 180), (200, 200, 200), 10)
+        cv2.line(frame, hip, (hip[0] + 50, cy + 180), (200, 200, 200), 10)
+        return True, frame
+
+    def release(self):
+        pass
+
+
+class LoopingVideoSource:
+    """Camera stand-in that replays a video file forever"""
+
+    def __init__(self, path):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video {path}")
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, falling back to peak RSS)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SoakMonitor:
+    """
+    Collects per-frame latency and pose detections and samples memory
+    over fixed windows. The first window is treated as warm-up and used as
+    the baseline.
+    """
+
+    def __init__(self, window_seconds=60.0, top_allocators=10, trace=True):
+        self.window_seconds = window_seconds
+        self.top_allocators = top_allocators
+        self.trace = trace
+        self.samples = []
+        self._latencies = []
+        self._detections = 0
+        self._window_start = time.monotonic()
+        self._start = self._window_start
+        self._baseline_snapshot = None
+        if trace:
+            tracemalloc.start()
+
+    def record(self, latency_seconds, has_pose):
+        self._latencies.append(latency_seconds * 1000)
+        self._detections += bool(has_pose)
+        if time.monotonic() - self._window_start >= self.window_seconds:
+            self.sample()
+
+    def sample(self, partial=False):
+        latencies = np.asarray(self._latencies, dtype=np.float64)
+        detections = self._detections
+        self._latencies = []
+        self._detections = 0
+        now = time.monotonic()
+
+        gc.collect()
+        sample = {
+            "elapsed_seconds": round(now - self._start, 1),
+            "frames": len(latencies),
+            "fps": round(len(latencies) / (now - self._window_start), 2),
+            # Without detections most of the live path never runs
+            "detection_rate": round(detections / len(latencies), 3) if len(latencies) else 0.0,
+            "rss_mb": round(rss_mb(), 2),
+            "gc_objects": len(gc.get_objects()),
+            "partial": partial,
+        }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            sample.update({
+                "latency_p50_ms": round(float(p50), 2),
+                "latency_p95_ms": round(float(p95), 2),
+                "latency_p99_ms": round(float(p99), 2),
+                "latency_max_ms": round(float(latencies.max()), 2),
+            })
+
+        if self.trace:
+            current, _ = tracemalloc.get_traced_memory()
+            sample["traced_mb"] = round(current / 1024 / 1024, 2)
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            if self._baseline_snapshot is None:
+                self._baseline_snapshot = snapshot
+            else:
+                stats = snapshot.compare_to(self._baseline_snapshot, "lineno")[:self.top_allocators]
+                sample["top_growth"] = [
+                    {"location": str(stat.traceback[0]), "size_diff_kb": round(stat.size_diff / 1024, 1),
+                     "count_diff": stat.count_diff}
+                    for stat in stats
+                ]
+
+        self.samples.append(sample)
+        self._window_start = now
+        print(json.dumps({k: v for k, v in sample.items() if k != "top_growth"}))
+        return sample
+
+    def finish(self):
+        """Close the last partial window"""
+        if self._latencies:
+            self.sample(partial=True)
+        if self.trace:
+            tracemalloc.stop()
+
+    def evaluate(self, max_growth_mb, max_latency_drift, require_pose=True):
+        """Return a list of failure messages (empty when the run passed)"""
+        failures = []
+        # A closing partial window may hold only a few frames; judge full ones
+        windows = [s for s in self.samples if s["frames"] and not s["partial"]]
+        if len(windows) < 2:
+            return ["Not enough full sample windows; run longer than two windows"]
+
+        undetected = [s["elapsed_seconds"] for s in windows if s["detection_rate"] == 0]
+        if require_pose and undetected:
+            failures.append(
+                f"No pose detected in {len(undetected)} of {len(windows)} windows "
+                f"(first ending at {undetected[0]}s), so classification, analytics "
+                f"and the results text were not exercised"
+            )
+
+        baseline, final = windows[0], windows[-1]
+        growth = final["rss_mb"] - baseline["rss_mb"]
+        if growth > max_growth_mb:
+            failures.append(
+                f"RSS grew {growth:.1f} MB since warm-up (limit {max_growth_mb} MB)"
+            )
+
+        if "latency_p95_ms" in baseline and baseline["latency_p95_ms"] > 0:
+            drift = final["latency_p95_ms"] / baseline["latency_p95_ms"]
+            if drift > max_latency_drift:
+                failures.append(
+                    f"p95 latency drifted {drift:.2f}x "
+                    f"({baseline['latency_p95_ms']:.1f} -> {final['latency_p95_ms']:.1f} ms, "
+                    f"limit {max_latency_drift}x)"
+                )
+        return failures
+
+
+def run_headless(source, duration, monitor, reference_file, flows_file, motion_gating, results_path=None):
+    """Drive LivePipeline directly, the same per-frame work as update_camera"""
+    from src.live_pipeline import LivePipeline
+    from src.motion_gate import MotionGate
+    from src.pose_classifier import PoseClassifier
+    from src.results_sink import open_sink
+    from src.sequence_matcher import SequenceMatcher
+    from src.session_analytics import SessionAnalytics
+    from src.yoga_pose_analyzer import YogaPoseAnalyzer
+
+    analyzer = YogaPoseAnalyzer()
+    classifier = PoseClassifier(reference_file=reference_file)
+    matcher = SequenceMatcher.from_files(classifier.reference_poses, flows_file, analyzer.joint_names)
+    sink = open_sink(results_path) if results_path else None
+    pipeline = LivePipeline(analyzer, classifier, SessionAnalytics(analyzer.joint_names), matcher,
+                            sink=sink, source="soak")
+    gate = MotionGate() if motion_gating else None
+
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        ret, frame = source.read()
+        if not ret:
+            break
+        start = time.perf_counter()
+        _, frame_result = pipeline.process(frame, motion_gate=gate)
+        monitor.record(time.perf_counter() - start, frame_result.has_pose)
+
+    if sink:
+        sink.close()
+        print(json.dumps({"results_log": sink.stats()}))
+
+
+def run_gui(source, duration, monitor, motion_gating):
+    """
+    Drive the real YogaPoseEstimatorGUI.update_camera loop, including the
+    Tk textbox updates. Needs an X display (e.g. run under xvfb-run).
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import customtkinter as ctk
+    from yoga_pose_gui import YogaPoseEstimatorGUI
+
+    root = ctk.CTk()
+    app = YogaPoseEstimatorGUI(root)
+    app.motion_gating_enabled = motion_gating
+
+    original_update = app.update_camera
+    original_process = app.pipeline.process
+    last = {"has_pose": False}
+
+    def process(*args, **kwargs):
+        processed_frame, frame_result = original_process(*args, **kwargs)
+        last["has_pose"] = frame_result.has_pose
+        return processed_frame, frame_result
+
+    def timed_update():
+        start = time.perf_counter()
+        original_update()
+        monitor.record(time.perf_counter() - start, last["has_pose"])
+
+    # update_camera reschedules itself through the instance attribute
+    app.update_camera = timed_update
+    app.pipeline.process = process
+    app.cap = source
+    app.is_camera_active = True
+    app.pipeline.reset()
+    root.after(int(duration * 1000), app.on_closing)
+    root.after(0, app.update_camera)
+    root.mainloop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the live frame loop")
+    parser.add_argument("--video", help="Video file to loop instead of the demo images")
+    parser.add_argument("--images", default=DEMO_DIR, help="Directory of pose photos to cycle through")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Use the rendered stick figure (exercises only the no-pose path)")
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--window", type=float, default=60.0, help="Sample window in seconds")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0)
+    parser.add_argument("--max-latency-drift", type=float, default=1.5,
+                        help="Allowed ratio of final to warm-up p95 latency")
+    parser.add_argument("--gui", action="store_true",
+                        help="Drive the Tk GUI update_camera loop (needs a display, e.g. xvfb-run)")
+    parser.add_argument("--no-motion-gating", action="store_true")
+    parser.add_argument("--no-tracemalloc", action="store_true")
+    parser.add_argument("--reference", default="reference_poses_weighted.json")
+    parser.add_argument("--flows", default="reference_flows.json")
+    parser.add_argument("--output", default="soak_report.json")
+    parser.add_argument("--results", help="Also log every frame result to this .jsonl/.sqlite file")
+    args = parser.parse_args()
+
+    if args.video:
+        source = LoopingVideoSource(args.video)
+    elif args.synthetic:
+        source = SyntheticSource()
+    else:
+        source = DemoImageSource.from_directory(args.images)
+    monitor = SoakMonitor(window_seconds=args.window, trace=not args.no_tracemalloc)
+    duration = args.hours * 3600
+    motion_gating = not args.no_motion_gating
+
+    if args.gui:
+        run_gui(source, duration, monitor, motion_gating)
+    else:
+        run_headless(source, duration, monitor, args.reference, args.flows, motion_gating,
+                     args.results)
+    source.release()
+    monitor.finish()
+
+    failures = monitor.evaluate(args.max_growth_mb, args.max_latency_drift,
+                                require_pose=not args.synthetic)
+    with open(args.output, 'w') as f:
+        json.dump({"samples": monitor.samples, "failures": failures}, f, indent=4)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"PASS: {len(monitor.samples)} windows, report saved to {args.output}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import queue
+import threading
+import cv2
+
+
+class AsyncVideoWriter:
+    """
+    Encodes annotated frames on a dedicated thread that owns the cv2.VideoWriter.
+
+    Frames are handed over through a bounded queue. When it is full the
+    "block" policy waits (offline export, no frame may be lost) and the
+    "drop" policy discards the frame (live capture, the frame loop must never
+    stall). Frames are not copied, so callers must not modify a frame after
+    passing it to write().
+
+    Frames written with a timestamp are placed on a fixed fps clock: a frame
+    is repeated to cover the time since the previous one, or skipped when
+    its slot was already written. Recordings of a loop that runs slower (or
+    faster) than fps therefore play back at real speed.
+    """
+
+    POLICIES = ("block", "drop")
+
+    def __init__(self, path, fps=30.0, fourcc="mp4v", queue_size=64, policy="block"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {self.POLICIES}")
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+        self._clock_start = None
+        self._clock_frames = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="video-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, frame, timestamp=None):
+        """
+        Queue one frame for encoding, optionally at a capture timestamp in
+        seconds (any monotonic clock). Returns False if it was not queued.
+        """
+        if self._stopped or self.error is not None:
+            return False
+
+        repeats = 1
+        if timestamp is not None:
+            if self._clock_start is None:
+                self._clock_start = timestamp
+            repeats = int((timestamp - self._clock_start) * self.fps) + 1 - self._clock_frames
+            if repeats <= 0:
+                return False  # this clock slot already has a frame
+
+        if self.policy == "block":
+            self.queue.put((frame, repeats))
+        else:
+            try:
+                self.queue.put_nowait((frame, repeats))
+            except queue.Full:
+                # The clock is not advanced, so the next frame fills the gap
+                self.dropped += 1
+                return False
+        self._clock_frames += repeats
+        return True
+
+    def stop(self):
+        """Flush every queued frame, close the file and wait for the writer thread"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self.queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        writer = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            frame, repeats = item
+            if self.error is not None:
+                continue  # keep draining so producers never block forever
+            try:
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(
+                        self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (width, height)
+                    )
+                    if not writer.isOpened():
+                        self.error = f"Could not open video writer for {self.path}"
+                        continue
+                for _ in range(repeats):
+                    writer.write(frame)
+                self.written += repeats
+            except Exception as e:
+                self.error = str(e)
+
+        if writer is not None:
+            writer.release()
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+            "error": self.error,
+        }
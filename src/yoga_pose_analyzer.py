@@ -1,9 +1,95 @@
-from src.pose_detector import PoseDetector, calculate_angle, calculate_angle_3d
+import threading
+import time
+import numpy as np
+from src.pose_detector import PoseDetector, calculate_angles_3d
+from src.frame_result import FrameResult, NUM_LANDMARKS
 
 class YogaPoseAnalyzer:
-    def __init__(self, static_image_mode=True):
-        self.detector = PoseDetector(static_image_mode=static_image_mode)
+    """
+    Pose analysis over a pool of MediaPipe detectors keyed by mode.
+
+    Single images go through one static detector, which runs the person
+    detector on every call. Each named stream gets its own tracking
+    detector, so ROI tracking and landmark smoothing carry over between
+    its frames and other callers never disturb that state. Calls without
+    a stream use the static detector, or the "default" stream when
+    static_image_mode is False. Detectors unused for idle_timeout seconds
+    are closed and rebuilt on demand.
+    """
+
+    STATIC = "static"
+    DEFAULT_STREAM = "default"
+
+    def __init__(self, static_image_mode=True, model_complexity=2,
+                 min_detection_confidence=0.6, min_tracking_confidence=0.6, idle_timeout=60.0):
+        self.static_image_mode = static_image_mode
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.idle_timeout = idle_timeout
+        self._detectors = {}
+        self._last_used = {}
+        self._pool_lock = threading.Lock()
+        self._next_idle_check = time.monotonic() + idle_timeout
         self.joint_pairs = self.define_joint_pairs()
+        self.joint_names = tuple(self.joint_pairs)
+        self.joint_indices = np.array(list(self.joint_pairs.values()), dtype=np.intp)
+        self._last_results = None
+
+    def _key(self, stream):
+        if stream is None:
+            return self.STATIC if self.static_image_mode else self.DEFAULT_STREAM
+        return stream
+
+    def get_detector(self, stream=None):
+        """Detector for a stream (None for the default mode), created on first use"""
+        key = self._key(stream)
+        with self._pool_lock:
+            detector = self._detectors.get(key)
+            if detector is None:
+                detector = PoseDetector(
+                    static_image_mode=key == self.STATIC,
+                    model_complexity=self.model_complexity,
+                    min_detection_confidence=self.min_detection_confidence,
+                    min_tracking_confidence=self.min_tracking_confidence
+                )
+                self._detectors[key] = detector
+            self._last_used[key] = time.monotonic()
+        return detector
+
+    @property
+    def detector(self):
+        return self.get_detector()
+
+    def release(self, stream=None):
+        """Close a stream's detector; its tracking state starts fresh next time"""
+        key = self._key(stream)
+        with self._pool_lock:
+            detector = self._detectors.pop(key, None)
+            self._last_used.pop(key, None)
+        if detector is not None:
+            detector.close()
+
+    def release_idle(self, now=None):
+        """Close detectors not used for idle_timeout seconds"""
+        now = time.monotonic() if now is None else now
+        with self._pool_lock:
+            idle = [key for key, used in self._last_used.items() if now - used >= self.idle_timeout]
+            detectors = [self._detectors.pop(key) for key in idle]
+            for key in idle:
+                del self._last_used[key]
+        for detector in detectors:
+            detector.close()
+        return idle
+
+    def close(self):
+        """Close every pooled detector"""
+        with self._pool_lock:
+            detectors = list(self._detectors.values())
+            self._detectors.clear()
+            self._last_used.clear()
+        for detector in detectors:
+            detector.close()
 
     def define_joint_pairs(self):
         """Define joint pairs for angle calculation"""
@@ -38,22 +124,66 @@ class YogaPoseAnalyzer:
             31: "Left Foot Index", 32: "Right Foot Index"
         }
     
-    def analyze_pose(self, image):
+    def analyze_pose(self, image, motion_gate=None, stream=None):
         """
-        Analyze pose and calculate key angles
+        Analyze pose and calculate key angles.
+        Compatibility wrapper around analyze_frame returning (image, angles dict, results).
         """
-        image, results = self.detector.detect_pose(image, keypoints_only=True)
-        angles = {}
-        
+        image, frame_result = self.analyze_frame(image, motion_gate=motion_gate, stream=stream)
+        if frame_result.reused:
+            results = motion_gate.cached_results
+        else:
+            results = self._last_results
+        return image, frame_result.angle_dict(), results
+
+    def analyze_frame(self, image, motion_gate=None, timestamp=None, stream=None):
+        """
+        Analyze pose and return (annotated image, FrameResult).
+        Frames of a video or camera should pass a stream name so they share
+        one tracking detector. With a MotionGate, static frames reuse the
+        previous landmarks and angles.
+        """
+        captured_at = time.time() if timestamp is None else timestamp
+        captured_mono = time.monotonic()
+        if time.monotonic() >= self._next_idle_check:
+            self._next_idle_check = time.monotonic() + self.idle_timeout
+            self.release_idle()
+        detector = self.get_detector(stream)
+
+        if motion_gate is not None and motion_gate.should_skip(image):
+            image = detector.draw_pose(image, motion_gate.cached_results, keypoints_only=True)
+            return image, motion_gate.cached_frame.reuse(captured_at, time.time(), captured_mono)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        image, results = detector.detect_pose(image, keypoints_only=True)
+        height, width = image.shape[:2]
+
+        landmark_block = None
+        angles = None
         if results.pose_landmarks:
-            landmarks = self.detector.get_landmark_coordinates(results, image.shape)
-            
-            # Calculate angles for each joint pair
-            for joint_name, indices in self.joint_pairs.items():
-                # Pass the first 3 elements (x, y, z) of the landmarks
-                points = [landmarks[idx][:3] for idx in indices]
-                # Use the new 3D angle calculation
-                angle = calculate_angle_3d(points[0], points[1], points[2])
-                angles[joint_name] = angle
-        
-        return image, angles, results
\ No newline at end of file
+            landmark_block = np.array(
+                [(lm.x, lm.y, lm.z, lm.visibility) for lm in results.pose_landmarks.landmark],
+                dtype=np.float32
+            ).reshape(NUM_LANDMARKS, 4)
+
+            # Angles use pixel-scaled x/y like get_landmark_coordinates
+            points = landmark_block[:, :3] * np.array([width, height, 1.0], dtype=np.float32)
+            angles = calculate_angles_3d(points, self.joint_indices)
+
+        frame_result = FrameResult(
+            self.joint_names,
+            landmark_block=landmark_block,
+            angles=angles,
+            image_size=(width, height),
+            captured_at=captured_at,
+            captured_mono=captured_mono,
+            processed_at=time.time(),
+            inference_ms=(time.perf_counter() - wall_start) * 1000
+        )
+        self._last_results = results
+
+        if motion_gate is not None:
+            motion_gate.store(results, frame_result, time.process_time() - cpu_start)
+
+        return image, frame_result
@@ -0,0 +1,141 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.pose_classifier import PoseClassifier, mirror_joint, validate_reference_poses
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE_FILE = os.path.join(ROOT, "reference_poses_weighted.json")
+
+with open(REFERENCE_FILE) as f:
+    REFERENCE_POSES = json.load(f)
+
+
+def write_library(path, reference_poses, mtime=None):
+    with open(path, "w") as f:
+        json.dump(reference_poses, f)
+    if mtime is not None:
+        # Coarse filesystem timestamps: make every rewrite visible to the watcher
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_shipped_library_is_valid():
+    validate_reference_poses(REFERENCE_POSES)
+
+
+@pytest.mark.parametrize("reference_poses", [
+    [],
+    {"Tadasana": 180},
+    {"Tadasana": {"left_knee": 200}},
+    {"Tadasana": {"left_knee": -1}},
+    {"Tadasana": {"left_knee": "180"}},
+    {"Tadasana": {"left_knee": True}},
+    {"Tadasana": {"left_knee": 180, "_weights": [1]}},
+    {"Tadasana": {"left_knee": 180, "_weights": {"right_knee": 1}}},
+    {"Tadasana": {"left_knee": 180, "_weights": {"left_knee": -2}}},
+])
+def test_invalid_libraries_are_rejected(reference_poses):
+    with pytest.raises(ValueError):
+        validate_reference_poses(reference_poses)
+
+
+def test_missing_file_gives_an_empty_library(tmp_path):
+    classifier = PoseClassifier(reference_file=str(tmp_path / "missing.json"))
+
+    assert classifier.pose_names == ()
+    assert classifier.reference_poses == {}
+    assert classifier.last_error
+    assert classifier.classify_pose({"left_knee": 180}) == ("Unknown", 0)
+
+
+@pytest.mark.parametrize("contents", ["{not json", json.dumps({"Tadasana": {"left_knee": 400}})])
+def test_bad_file_keeps_the_last_good_library(tmp_path, contents):
+    path = write_library(tmp_path / "poses.json", REFERENCE_POSES)
+    classifier = PoseClassifier(reference_file=path)
+    library = classifier.library
+
+    with open(path, "w") as f:
+        f.write(contents)
+
+    assert not classifier.reload()
+    assert classifier.library is library
+    assert classifier.version == 1
+    assert classifier.last_error
+
+
+def test_reload_clears_the_error_once_the_file_is_fixed(tmp_path):
+    path = write_library(tmp_path / "poses.json", {"Tadasana": {"left_knee": 400}})
+    classifier = PoseClassifier(reference_file=path)
+    assert classifier.last_error
+
+    write_library(path, REFERENCE_POSES)
+    assert classifier.reload()
+    assert classifier.last_error is None
+    assert classifier.pose_names == tuple(REFERENCE_POSES)
+
+
+def test_watcher_picks_up_a_changed_file(tmp_path):
+    path = write_library(tmp_path / "poses.json", {"Tadasana": {"left_knee": 180}}, mtime=1_000_000)
+    classifier = PoseClassifier(reference_file=path)
+    classifier.start_watching(poll_interval=0.01)
+    try:
+        write_library(path, REFERENCE_POSES, mtime=2_000_000)
+        assert wait_for(lambda: classifier.version == 2)
+        assert classifier.pose_names == tuple(REFERENCE_POSES)
+
+        write_library(path, {"Tadasana": {"left_knee": 400}}, mtime=3_000_000)
+        assert wait_for(lambda: classifier.last_error is not None)
+        assert classifier.version == 2
+        assert classifier.pose_names == tuple(REFERENCE_POSES)
+    finally:
+        classifier.stop_watching()
+
+
+def test_vectorized_scores_match_the_dict_loop():
+    classifier = PoseClassifier(reference_file=REFERENCE_FILE)
+    library = classifier.library
+    rng = np.random.default_rng(0)
+
+    for _ in range(20):
+        # A random subset of joints, as when some landmarks are not visible
+        joints = [j for j in library.joint_names if rng.random() < 0.8]
+        current_angles = {joint: float(rng.uniform(0, 180)) for joint in joints}
+
+        observed = np.zeros(len(library.joint_names), dtype=np.float32)
+        present = np.zeros(len(library.joint_names), dtype=np.float32)
+        for joint, angle in current_angles.items():
+            observed[library.joint_index[joint]] = angle
+            present[library.joint_index[joint]] = 1.0
+        scores = library.score(observed, present)[0]
+
+        expected = [classifier.calculate_similarity(current_angles, REFERENCE_POSES[name])
+                    for name in library.pose_names]
+        np.testing.assert_allclose(scores, expected, atol=1e-3)
+
+        pose_name, score, mirrored = classifier.match_pose(current_angles, threshold=0)
+        if not mirrored:
+            assert pose_name == library.pose_names[int(np.argmax(expected))]
+            assert score == pytest.approx(max(expected), abs=1e-3)
+
+
+@pytest.mark.parametrize("pose_name", ["Virabhadrasana II", "Utthita Trikonasana"])
+def test_pose_on_the_other_side_matches_mirrored(pose_name):
+    classifier = PoseClassifier(reference_file=REFERENCE_FILE)
+    angles = {joint: angle for joint, angle in REFERENCE_POSES[pose_name].items() if joint != "_weights"}
+    mirrored_angles = {mirror_joint(joint): angle for joint, angle in angles.items()}
+
+    assert classifier.match_pose(angles) == (pose_name, pytest.approx(100), False)
+    assert classifier.match_pose(mirrored_angles) == (pose_name, pytest.approx(100), True)
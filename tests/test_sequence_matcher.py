@@ -0,0 +1,144 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.pose_classifier import mirror_joint
+from src.sequence_matcher import SequenceMatcher
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# YogaPoseAnalyzer.joint_names, without importing MediaPipe
+JOINT_NAMES = (
+    'left_elbow', 'right_elbow', 'left_wrist', 'right_wrist',
+    'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle',
+    'left_heel', 'right_heel',
+)
+
+
+def load(name):
+    with open(os.path.join(ROOT, name)) as f:
+        return json.load(f)
+
+
+REFERENCE_POSES = load("reference_poses_weighted.json")
+FLOWS = load("reference_flows.json")
+
+
+def pose_angles(pose_name, mirrored=False):
+    # Joints the reference pose leaves out carry no weight; give them a neutral angle
+    angles = np.full(len(JOINT_NAMES), 150.0)
+    for joint, angle in REFERENCE_POSES[pose_name].items():
+        if joint in JOINT_NAMES:
+            angles[JOINT_NAMES.index(mirror_joint(joint) if mirrored else joint)] = angle
+    return angles
+
+
+def replay(segments, fps=10, noise=0.0, seed=0, mirrored=()):
+    """
+    Feed (pose name, seconds) segments at fps and return one
+    (pose being held, match) pair per completed timeline sample.
+    Segments whose index is in mirrored are done on the other side, and
+    a pose name of None is a gap with no pose detected.
+    """
+    rng = np.random.default_rng(seed)
+    matcher = SequenceMatcher(REFERENCE_POSES, FLOWS, JOINT_NAMES)
+    reported = []
+    frame = 0
+    for index, (pose_name, seconds) in enumerate(segments):
+        angles = pose_angles(pose_name, index in mirrored) if pose_name else None
+        for _ in range(int(round(seconds * fps))):
+            angles_with_noise = None
+            if angles is not None:
+                angles_with_noise = angles + rng.normal(0.0, noise, len(JOINT_NAMES))
+            if matcher.update(frame / fps, angles_with_noise):
+                reported.append((pose_name, matcher.match()))
+            frame += 1
+    return reported
+
+
+def flow_segments(flow_name, tempo=1.0):
+    flow = FLOWS[flow_name]
+    return [(pose_name, flow["step_seconds"] * tempo) for pose_name in flow["steps"]]
+
+
+def step_sequence(reported):
+    """Distinct (flow, step) pairs in the order they were first reported"""
+    steps = []
+    for _, match in reported:
+        if match and (match["flow"], match["step"]) not in steps:
+            steps.append((match["flow"], match["step"]))
+    return steps
+
+
+@pytest.mark.parametrize("flow_name", list(FLOWS))
+@pytest.mark.parametrize("noise", [0.0, 8.0])
+def test_replayed_flow_reports_every_step_in_order(flow_name, noise):
+    reported = replay(flow_segments(flow_name), noise=noise)
+    total_steps = len(FLOWS[flow_name]["steps"])
+
+    # The first step is a single held pose, so tracking starts at step 1
+    assert step_sequence(reported) == [(flow_name, step) for step in range(1, total_steps)]
+
+
+@pytest.mark.parametrize("flow_name", list(FLOWS))
+def test_flow_is_reported_while_in_progress(flow_name):
+    steps = FLOWS[flow_name]["steps"]
+    reported = replay(flow_segments(flow_name)[:3])
+
+    _, match = reported[-1]
+    assert match["flow"] == flow_name
+    assert match["step"] == 2
+    assert match["step_name"] == steps[2]
+    assert match["score"] >= 90
+
+
+@pytest.mark.parametrize("flow_name", ["Warrior Flow", "Surya Namaskar"])
+def test_steps_done_on_the_other_side_still_match(flow_name):
+    segments = flow_segments(flow_name)
+    everything = replay(segments, mirrored=range(len(segments)))
+    alternating = replay(segments, mirrored=range(1, len(segments), 2))
+
+    expected = [(flow_name, step) for step in range(1, len(segments))]
+    assert step_sequence(everything) == expected
+    assert step_sequence(alternating) == expected
+
+
+def test_holding_the_final_pose_keeps_the_final_step():
+    segments = flow_segments("Surya Namaskar") + [("Tadasana", 20)]
+    _, match = replay(segments)[-1]
+
+    assert match["flow"] == "Surya Namaskar"
+    assert match["step"] == len(FLOWS["Surya Namaskar"]["steps"]) - 1
+    assert match["lag_seconds"] == 0
+
+
+def test_poses_before_the_flow_do_not_hide_it():
+    segments = [("Sukhasana", 6)] + flow_segments("Warrior Flow")
+    assert step_sequence(replay(segments)) == [("Warrior Flow", step) for step in range(1, 6)]
+
+
+def test_holding_a_single_pose_matches_no_flow():
+    assert all(match is None for _, match in replay([("Tadasana", 30)]))
+
+
+@pytest.mark.parametrize("tempo, sign", [(1.5, 1), (0.75, -1)])
+def test_lag_follows_the_tempo(tempo, sign):
+    _, match = replay(flow_segments("Surya Namaskar", tempo))[-1]
+    step_seconds = FLOWS["Surya Namaskar"]["step_seconds"]
+
+    # Every step after the one where the flow was recognized drifts by (tempo - 1) steps
+    expected = (len(FLOWS["Surya Namaskar"]["steps"]) - 2) * (tempo - 1) * step_seconds
+    assert np.sign(match["lag_seconds"]) == sign
+    assert match["lag_seconds"] == pytest.approx(expected, abs=step_seconds / 2)
+
+
+def test_time_without_a_pose_counts_as_lag():
+    segments = flow_segments("Surya Namaskar")
+    reported = replay(segments[:5] + [(None, 12)] + segments[5:])
+    _, match = reported[-1]
+
+    assert step_sequence(reported) == [("Surya Namaskar", step) for step in range(1, 7)]
+    assert match["lag_seconds"] == pytest.approx(12, abs=0.5)
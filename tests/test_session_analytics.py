@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from src.frame_result import FrameResult
+from src.session_analytics import SessionAnalytics
+
+JOINT_NAMES = ('left_elbow', 'right_elbow', 'left_knee', 'right_knee')
+
+# Exact in binary, so run lengths land exactly on min_hold_seconds
+FRAME_INTERVAL = 0.25
+
+
+def feed(analytics, segments, start=0.0):
+    """Feed (pose name, seconds) segments; a pose name of None has no pose detected"""
+    timestamp = start
+    for pose_name, seconds in segments:
+        for _ in range(int(seconds / FRAME_INTERVAL)):
+            angles = {joint: 90.0 for joint in JOINT_NAMES} if pose_name else {}
+            analytics.update(angles, pose_name, confidence=80.0, timestamp=timestamp)
+            timestamp += FRAME_INTERVAL
+    return timestamp
+
+
+def random_frames(count, seed=0, missing=0.2):
+    """(timestamp, angles dict) pairs with some joints left out, never all"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for index in range(count):
+        angles = {joint: float(rng.normal(120, 30)) for joint in JOINT_NAMES
+                  if joint == JOINT_NAMES[0] or rng.random() >= missing}
+        frames.append((index * FRAME_INTERVAL, angles))
+    return frames
+
+
+def expected_stats(frames, ddof=0):
+    """Per-joint (mean, std) computed directly from the frames"""
+    stats = {}
+    for joint in JOINT_NAMES:
+        values = [angles[joint] for _, angles in frames if joint in angles]
+        if values:
+            stats[joint] = (np.mean(values), np.std(values, ddof=ddof) if len(values) > ddof else 0.0)
+    return stats
+
+
+def assert_stats_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for joint, (mean, std) in expected.items():
+        assert actual[joint][0] == pytest.approx(mean, abs=1e-6)
+        assert actual[joint][1] == pytest.approx(std, abs=1e-6)
+
+
+def test_window_evicts_samples_older_than_window_seconds():
+    analytics = SessionAnalytics(JOINT_NAMES, window_seconds=2.0, capacity=1000)
+    frames = random_frames(40)
+    for timestamp, angles in frames:
+        analytics.update(angles, "Tadasana", timestamp=timestamp)
+
+    now = frames[-1][0]
+    in_window = [(t, angles) for t, angles in frames if t >= now - 2.0]
+    assert_stats_equal(analytics.joint_stability(), expected_stats(in_window))
+
+
+def test_window_keeps_at_most_capacity_samples():
+    analytics = SessionAnalytics(JOINT_NAMES, window_seconds=1000.0, capacity=25)
+    frames = random_frames(100, seed=1)
+    for timestamp, angles in frames:
+        analytics.update(angles, "Tadasana", timestamp=timestamp)
+
+    assert_stats_equal(analytics.joint_stability(), expected_stats(frames[-25:]))
+
+
+def test_rolling_std_stays_exact_over_a_long_session():
+    # Large offsets make naive running sums drift; the periodic resum cancels it
+    analytics = SessionAnalytics(JOINT_NAMES, window_seconds=3.0, capacity=50)
+    rng = np.random.default_rng(2)
+    frames = [(index * FRAME_INTERVAL, {joint: float(1e4 + rng.normal(0, 0.5)) for joint in JOINT_NAMES})
+              for index in range(5000)]
+    for timestamp, angles in frames:
+        analytics.update(angles, "Tadasana", timestamp=timestamp)
+
+    now = frames[-1][0]
+    expected = expected_stats([(t, angles) for t, angles in frames if t >= now - 3.0])
+    for joint, (mean, std) in analytics.joint_stability().items():
+        assert mean == pytest.approx(expected[joint][0], abs=1e-6)
+        assert std == pytest.approx(expected[joint][1], abs=1e-4)
+
+
+def test_session_stats_match_numpy():
+    analytics = SessionAnalytics(JOINT_NAMES, window_seconds=1.0, capacity=10)
+    frames = random_frames(500, seed=3)
+    for timestamp, angles in frames:
+        analytics.update(angles, "Tadasana", timestamp=timestamp)
+
+    assert_stats_equal(analytics.session_joint_stats(), expected_stats(frames, ddof=1))
+
+
+def test_holds_count_from_min_hold_seconds():
+    analytics = SessionAnalytics(JOINT_NAMES, min_hold_seconds=1.0)
+    feed(analytics, [
+        ("Tadasana", 1.0),       # exactly min_hold_seconds: a hold
+        ("Vrksasana", 0.75),     # too short
+        ("Tadasana", 2.0),
+        (None, 0.5),
+        ("Vrksasana", 1.5),      # still running at the end of the session
+    ])
+    poses = analytics.summary()["poses"]
+
+    assert poses["Tadasana"]["holds"] == 2
+    assert poses["Tadasana"]["longest_hold_seconds"] == pytest.approx(1.75)
+    assert poses["Tadasana"]["dwell_seconds"] == pytest.approx(3.0)
+    assert poses["Vrksasana"]["holds"] == 1
+    assert poses["Vrksasana"]["dwell_seconds"] == pytest.approx(0.75 + 1.25)
+    assert poses[SessionAnalytics.NO_POSE]["holds"] == 0
+    assert analytics.current_hold() == ("Vrksasana", pytest.approx(1.25))
+
+
+def test_short_final_run_is_not_a_hold():
+    analytics = SessionAnalytics(JOINT_NAMES, min_hold_seconds=1.0)
+    feed(analytics, [("Tadasana", 2.0), ("Vrksasana", 0.75)])
+    poses = analytics.summary()["poses"]
+
+    assert poses["Tadasana"]["holds"] == 1
+    assert poses["Vrksasana"]["holds"] == 0
+
+
+def test_frame_results_and_dicts_give_the_same_stats():
+    from_dicts = SessionAnalytics(JOINT_NAMES, window_seconds=2.0, capacity=30)
+    from_frames = SessionAnalytics(JOINT_NAMES, window_seconds=2.0, capacity=30)
+    rng = np.random.default_rng(4)
+
+    for index in range(100):
+        timestamp = index * FRAME_INTERVAL
+        angles = rng.normal(120, 30, len(JOINT_NAMES)).astype(np.float32)
+        from_dicts.update(dict(zip(JOINT_NAMES, angles.tolist())), "Tadasana", 75.0, timestamp)
+
+        frame_result = FrameResult(JOINT_NAMES, angles=angles, captured_mono=timestamp)
+        frame_result.set_label(("Tadasana",), 0, 75.0)
+        from_frames.update_frame(frame_result)
+
+    assert from_frames.summary() == from_dicts.summary()
@@ -1,12 +1,21 @@
 import sys
 import os
+import json
+import threading
 import cv2
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from PIL import Image
 
-from src.pose_classifier import PoseClassifier
+from src.pose_classifier import PoseClassifier, mirror_joint
 from src.yoga_pose_analyzer import YogaPoseAnalyzer
+from src.session_analytics import SessionAnalytics
+from src.motion_gate import MotionGate
+from src.pose_detector import draw_pose_label
+from src.video_exporter import AsyncVideoWriter
+from src.sequence_matcher import SequenceMatcher
+from src.live_pipeline import LivePipeline
+from src.results_sink import open_sink
 from config.styles import AppStyles
 
 if getattr(sys, 'frozen', False):
@@ -54,12 +63,20 @@ class YogaPoseEstimatorGUI:
         self.root.geometry("1400x800")
         self.root.minsize(1200, 700)
         
-        # Initialize components
+        # Initialize components; uploads use the static detector and the
+        # camera its own tracking detector from the same pool
         self.analyzer = YogaPoseAnalyzer()
         self.styles = AppStyles()
         # Initialize classifier with JSON file
         reference_file = resource_path("reference_poses_weighted.json")
         self.classifier = PoseClassifier(reference_file=reference_file)
+        self.analytics = SessionAnalytics(self.analyzer.joint_names)
+        self.motion_gate = MotionGate()
+        self.sequence_matcher = self.load_sequence_matcher(resource_path("reference_flows.json"))
+        self.pipeline = LivePipeline(
+            self.analyzer, self.classifier, self.analytics, self.sequence_matcher
+        )
+        self.motion_gating_enabled = True
 
         # Colors
         self.colors = self.styles.COLORS
@@ -75,13 +92,64 @@ class YogaPoseEstimatorGUI:
         self.is_camera_active = False
         self.current_image = None
         self.camera_btn = None
+        self.camera_frames = 0
+        self.inference_ms = None
+        
+        # Video export variables
+        self.recorder = None
+        self.record_btn = None
+        self.export_thread = None
+        self.export_cancel = threading.Event()
+        self.export_progress = 0.0
+        self.export_status = None
+        
+        # Results log shared by live, upload and video export
+        self.results_sink = None
         
         # Create GUI
         self.create_enhanced_widgets()
+        
+        # Pick up edits to the reference poses without a restart
+        self.reference_version = self.classifier.version
+        self.reference_error = self.classifier.last_error
+        self.classifier.start_watching()
+        self.root.after(1000, self.poll_reference_reload)
+        self.root.after(int(self.analyzer.idle_timeout * 1000), self.release_idle_detectors)
 
         # Bind closing event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def load_sequence_matcher(self, flows_file):
+        """Build the flow matcher, or return None if the flows file is invalid"""
+        try:
+            return SequenceMatcher.from_files(
+                self.classifier.reference_poses or {}, flows_file, self.analyzer.joint_names
+            )
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"Error loading {flows_file}: {e}")
+            return None
+
+    def poll_reference_reload(self):
+        """Rebuild what depends on the reference poses after the classifier reloads"""
+        classifier = self.classifier
+        if classifier.version != self.reference_version:
+            self.reference_version = classifier.version
+            self.sequence_matcher = self.load_sequence_matcher(resource_path("reference_flows.json"))
+            self.pipeline.sequence_matcher = self.sequence_matcher
+            self.pipeline.flow_match = None
+            self.status_label.configure(
+                text=f"Reference poses reloaded ({len(classifier.pose_names)} poses)"
+            )
+        elif classifier.last_error and classifier.last_error != self.reference_error:
+            self.status_label.configure(text=f"{classifier.last_error} - keeping previous poses")
+        self.reference_error = classifier.last_error
+        self.root.after(1000, self.poll_reference_reload)
+
+    def release_idle_detectors(self):
+        """Close detectors nobody used recently, even when no frames are coming in"""
+        self.analyzer.release_idle()
+        self.root.after(int(self.analyzer.idle_timeout * 1000), self.release_idle_detectors)
+
     def create_enhanced_widgets(self):
             # Configure grid layout with better proportions
             self.root.grid_columnconfigure(0, weight=0)
@@ -143,9 +211,16 @@ class YogaPoseEstimatorGUI:
                 "command": self.toggle_camera,
                 "color": self.colors["primary"],
                 "hover_color": self.colors["primary_dark"]
+            },
+            {
+                "text": "Record Video",
+                "command": self.toggle_recording,
+                "color": self.colors["accent"],
+                "hover_color": "#FF9F33"
             }
         ])
         self.camera_btn = camera_section[0]
+        self.record_btn = camera_section[1]
         
         # Image Upload Section
         self.create_section("Image Analysis", [
@@ -160,6 +235,28 @@ class YogaPoseEstimatorGUI:
                 "command": self.save_image,
                 "color": self.colors["accent"],
                 "hover_color": "#FF9F33"
+            },
+            {
+                "text": "Export Video",
+                "command": self.export_video,
+                "color": self.colors["secondary"],
+                "hover_color": "#5A7DEB"
+            }
+        ])
+
+        # Session Statistics Section
+        self.create_section("Session Statistics", [
+            {
+                "text": "Export Stats",
+                "command": self.export_session_stats,
+                "color": self.colors["secondary"],
+                "hover_color": "#5A7DEB"
+            },
+            {
+                "text": "Reset Stats",
+                "command": self.reset_session_stats,
+                "color": "gray40",
+                "hover_color": "gray30"
             }
         ])
         
@@ -271,6 +368,31 @@ class YogaPoseEstimatorGUI:
             dropdown_font=self.font_small
         )
         self.theme_option.pack(side="right")
+        
+        # Motion gating toggle
+        gate_frame = ctk.CTkFrame(section_frame, fg_color="transparent")
+        gate_frame.pack(fill="x", padx=15, pady=5)
+        
+        self.gate_switch = ctk.CTkSwitch(
+            gate_frame,
+            text="Skip inference on static frames",
+            command=self.toggle_motion_gating,
+            font=self.font_small
+        )
+        self.gate_switch.pack(side="left")
+        self.gate_switch.select()
+        
+        # Results log toggle
+        log_frame = ctk.CTkFrame(section_frame, fg_color="transparent")
+        log_frame.pack(fill="x", padx=15, pady=(5, 12))
+        
+        self.log_switch = ctk.CTkSwitch(
+            log_frame,
+            text="Save results log",
+            command=self.toggle_results_log,
+            font=self.font_small
+        )
+        self.log_switch.pack(side="left")
 
     def create_enhanced_main_content(self):
         self.main_frame = ctk.CTkFrame(self.root, corner_radius=0)
@@ -383,6 +505,44 @@ class YogaPoseEstimatorGUI:
 
     def change_theme(self, new_theme):
         ctk.set_appearance_mode(new_theme)
+    
+    def toggle_motion_gating(self):
+        self.motion_gating_enabled = bool(self.gate_switch.get())
+        self.motion_gate.reset()
+    
+    def toggle_results_log(self):
+        if self.log_switch.get():
+            file_path = filedialog.asksaveasfilename(
+                defaultextension=".sqlite",
+                filetypes=[("SQLite database", "*.sqlite"), ("JSON Lines", "*.jsonl")]
+            )
+            if not file_path:
+                self.log_switch.deselect()
+                return
+            self.results_sink = open_sink(file_path)
+            self.pipeline.sink = self.results_sink
+            self.status_label.configure(
+                text=f"Logging results to {os.path.basename(file_path)} "
+                     f"(session {self.results_sink.session})"
+            )
+        else:
+            self.close_results_log()
+    
+    def close_results_log(self):
+        if self.results_sink is None:
+            return
+        
+        sink, self.results_sink = self.results_sink, None
+        self.pipeline.sink = None
+        sink.close()
+        
+        stats = sink.stats()
+        if stats["error"]:
+            messagebox.showerror("Error", f"Error writing results log: {stats['error']}")
+        else:
+            self.status_label.configure(
+                text=f"Results log closed: {stats['written']} records, {stats['dropped']} dropped"
+            )
         
     def toggle_camera(self):
         if not self.is_camera_active:
@@ -403,6 +563,10 @@ class YogaPoseEstimatorGUI:
             return
         
         self.is_camera_active = True
+        self.camera_frames = 0
+        self.inference_ms = None
+        self.pipeline.reset()
+        self.motion_gate.reset()
         if self.camera_btn:
             self.camera_btn.configure(
                 text="Stop Camera", 
@@ -418,6 +582,7 @@ class YogaPoseEstimatorGUI:
     
     def stop_camera(self):
         self.is_camera_active = False
+        self.stop_recording()
         if self.cap:
             self.cap.release()
             self.cap = None
@@ -434,25 +599,42 @@ class YogaPoseEstimatorGUI:
             ret, frame = self.cap.read()
             if ret:
                 # Process frame
-                processed_frame, angles, _ = self.analyzer.analyze_pose(frame)
+                gate = self.motion_gate if self.motion_gating_enabled else None
+                processed_frame, frame_result = self.pipeline.process(frame, motion_gate=gate)
                 
-                # Classify pose
-                if angles:
-                    pose_name, confidence = self.classifier.classify_pose(angles)
-                    
-                    # Display information
-                    cv2.putText(processed_frame, f'Pose: {pose_name}', (10, 30), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    cv2.putText(processed_frame, f'Confidence: {confidence:.1f}%', (10, 60), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                # Hand the annotated frame to the encoder thread
+                if self.recorder is not None:
+                    # Timestamped writes keep playback at real speed whatever the loop rate
+                    self.recorder.write(processed_frame, timestamp=frame_result.captured_mono)
                 
                 # Show in separate window
                 cv2.imshow('Yoga Pose Estimator - Live Camera', processed_frame)
                 
                 # Update results in GUI
-                if angles:
-                    pose_name, confidence = self.classifier.classify_pose(angles)
-                    self.update_results_text(angles, pose_name, confidence)
+                if frame_result.has_pose:
+                    self.update_results_text(
+                        frame_result.angle_dict(), frame_result.pose_name,
+                        frame_result.score, frame_result.mirrored
+                    )
+                    self.append_flow_progress()
+                    self.append_session_stats()
+                
+                # Smoothed inference time of the frames that actually ran the detector
+                if not frame_result.reused:
+                    if self.inference_ms is None:
+                        self.inference_ms = frame_result.inference_ms
+                    else:
+                        self.inference_ms += 0.1 * (frame_result.inference_ms - self.inference_ms)
+                
+                # Report latency and motion gating savings periodically
+                self.camera_frames += 1
+                if self.camera_frames % 30 == 0 and self.inference_ms is not None:
+                    status = f"Camera active - inference {self.inference_ms:.0f} ms/frame"
+                    if gate is not None:
+                        stats = gate.stats()
+                        status += (f", skipped {stats['skip_ratio']:.0%} of frames, "
+                                   f"~{stats['cpu_saved_ratio']:.0%} inference CPU saved")
+                    self.status_label.configure(text=status)
             
             # Check for 'q' key press to stop camera
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -465,6 +647,145 @@ class YogaPoseEstimatorGUI:
         else:
             cv2.destroyAllWindows()
     
+    def toggle_recording(self):
+        if self.recorder is None:
+            self.start_recording()
+        else:
+            self.stop_recording()
+    
+    def start_recording(self):
+        if not self.is_camera_active:
+            messagebox.showwarning("Warning", "Start the camera before recording")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4"), ("AVI files", "*.avi")]
+        )
+        if not file_path:
+            return
+        
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        # Live capture must never stall: drop frames if the encoder falls behind
+        self.recorder = AsyncVideoWriter(file_path, fps=fps, policy="drop")
+        if self.record_btn:
+            self.record_btn.configure(text="Stop Recording", fg_color=self.colors["danger"])
+        self.status_label.configure(text=f"Recording to {os.path.basename(file_path)}")
+    
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        
+        recorder, self.recorder = self.recorder, None
+        recorder.stop()
+        if self.record_btn:
+            self.record_btn.configure(text="Record Video", fg_color=self.colors["accent"])
+        
+        stats = recorder.stats()
+        if stats["error"]:
+            messagebox.showerror("Error", f"Error recording video: {stats['error']}")
+        else:
+            self.status_label.configure(
+                text=f"Recording saved: {os.path.basename(recorder.path)} "
+                     f"({stats['written']} frames, {stats['dropped']} dropped)"
+            )
+    
+    def export_video(self):
+        if self.export_thread is not None:
+            messagebox.showwarning("Warning", "A video export is already running")
+            return
+        
+        input_path = filedialog.askopenfilename(
+            title="Select Video",
+            filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv")]
+        )
+        if not input_path:
+            return
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            filetypes=[("MP4 files", "*.mp4"), ("AVI files", "*.avi")]
+        )
+        if not output_path:
+            return
+        
+        self.export_progress = 0.0
+        self.export_status = None
+        self.export_cancel.clear()
+        self.progress_bar.grid()
+        self.progress_bar.set(0)
+        self.status_label.configure(text=f"Exporting {os.path.basename(input_path)}...")
+        
+        # Inference runs on a worker thread and encoding on the writer thread,
+        # so the Tk thread only polls for progress
+        self.export_thread = threading.Thread(
+            target=self.run_video_export,
+            args=(input_path, output_path),
+            daemon=True
+        )
+        self.export_thread.start()
+        self.root.after(200, self.poll_video_export)
+    
+    def run_video_export(self, input_path, output_path):
+        """
+        Annotate every frame of a video file (runs on the export thread)
+        """
+        cap = cv2.VideoCapture(input_path)
+        if not cap.isOpened():
+            self.export_status = f"Could not open video {os.path.basename(input_path)}"
+            return
+        
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        # Offline export must keep every frame: block when the encoder falls behind
+        writer = AsyncVideoWriter(output_path, fps=fps, policy="block")
+        # The export thread gets its own analyzer so it never shares a detector with the GUI
+        analyzer = YogaPoseAnalyzer(static_image_mode=False)
+        sink = self.results_sink
+        processed = 0
+        
+        try:
+            while not self.export_cancel.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                
+                processed_frame, frame_result = analyzer.analyze_frame(frame)
+                if frame_result.has_pose:
+                    pose_name, confidence = self.classifier.classify_frame(frame_result)
+                    draw_pose_label(processed_frame, pose_name, confidence)
+                writer.write(processed_frame)
+                if sink:
+                    sink.publish("video", input_path, frame_result)
+                
+                processed += 1
+                if total_frames:
+                    self.export_progress = processed / total_frames
+        except Exception as e:
+            self.export_status = f"Error exporting video: {str(e)}"
+            return
+        finally:
+            cap.release()
+            analyzer.close()
+            writer.stop()
+        
+        stats = writer.stats()
+        if stats["error"]:
+            self.export_status = f"Error exporting video: {stats['error']}"
+        elif self.export_cancel.is_set():
+            self.export_status = f"Video export cancelled: {os.path.basename(output_path)} ({stats['written']} frames)"
+        else:
+            self.export_status = f"Video saved: {os.path.basename(output_path)} ({stats['written']} frames)"
+    
+    def poll_video_export(self):
+        if self.export_thread is not None and self.export_thread.is_alive():
+            self.progress_bar.set(self.export_progress)
+            self.root.after(200, self.poll_video_export)
+            return
+        
+        self.export_thread = None
+        self.progress_bar.grid_remove()
+        self.status_label.configure(text=self.export_status or "Video export finished")
+    
     def upload_image(self):
         file_path = filedialog.askopenfilename(
             title="Select Image",
@@ -487,7 +808,7 @@ class YogaPoseEstimatorGUI:
                     return
                 
                 # Process image
-                processed_image, angles, results = self.analyzer.analyze_pose(image)
+                processed_image, frame_result = self.analyzer.analyze_frame(image)
                 self.current_image = processed_image
                 
                 # Convert to PIL Image
@@ -511,9 +832,13 @@ class YogaPoseEstimatorGUI:
                 self.display_label.image = ctk_image
                 
                 # Update results
-                if angles:
-                    pose_name, confidence = self.classifier.classify_pose(angles)
-                    self.update_results_text(angles, pose_name, confidence)
+                if frame_result.has_pose:
+                    pose_name, confidence = self.classifier.classify_frame(frame_result)
+                    self.update_results_text(
+                        frame_result.angle_dict(), pose_name, confidence, frame_result.mirrored
+                    )
+                if self.results_sink:
+                    self.results_sink.publish("upload", file_path, frame_result)
                 self.status_label.configure(text=f"Image processed: {os.path.basename(file_path)}")
 
                 # Hide progress bar
@@ -544,21 +869,18 @@ class YogaPoseEstimatorGUI:
         Process frame for real-time camera
         """
         # Analyze pose and get angles
-        processed_frame, angles, results = self.analyzer.analyze_pose(frame)
+        processed_frame, angles, results = self.analyzer.analyze_pose(frame, stream="camera")
         
         # Classify pose
         if angles:
             pose_name, confidence = self.classifier.classify_pose(angles)
             
             # Display classification result
-            cv2.putText(processed_frame, f'Pose: {pose_name}', (10, 30), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            cv2.putText(processed_frame, f'Confidence: {confidence:.1f}%', (10, 60), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            draw_pose_label(processed_frame, pose_name, confidence)
         
         return processed_frame, angles
     
-    def update_results_text(self, angles, pose_name, confidence):
+    def update_results_text(self, angles, pose_name, confidence, mirrored=False):
         """
         Update the results text widget with pose analysis
         """
@@ -575,7 +897,10 @@ class YogaPoseEstimatorGUI:
         # Display results with formatting
         self.results_text.insert("end", "POSE NAME: ")
         color_tag = "success" if pose_name != "Unknown Pose" else "danger"
-        self.results_text.insert("end", f"{pose_name}\n\n", color_tag)
+        self.results_text.insert("end", f"{pose_name}\n", color_tag)
+        if mirrored:
+            self.results_text.insert("end", "(mirrored side)\n")
+        self.results_text.insert("end", "\n")
         
         self.results_text.insert("end", "CONFIDENCE: ")
         confidence_color = "success" if confidence > 70 else "warning" if confidence > 50 else "danger"
@@ -590,7 +915,7 @@ class YogaPoseEstimatorGUI:
         
         # Add feedback if pose is detected
         if pose_name != "Unknown Pose":
-            feedback = self.provide_feedback(angles, pose_name)
+            feedback = self.provide_feedback(angles, pose_name, mirrored)
             if feedback:
                 self.results_text.insert("end", f"\nFEEDBACK:\n")
                 self.results_text.insert("end", "─" * 20 + "\n")
@@ -602,20 +927,83 @@ class YogaPoseEstimatorGUI:
         self.results_text.tag_config("warning", foreground=self.colors["warning"])
         self.results_text.tag_config("danger", foreground=self.colors["danger"])
     
-    def provide_feedback(self, current_angles, target_pose_name):
+    def append_flow_progress(self):
+        """
+        Append the recognized flow and the student's position in it
+        """
+        match = self.pipeline.flow_match
+        if not match:
+            return
+        self.results_text.insert("end", "\nFLOW:\n")
+        self.results_text.insert("end", "─" * 20 + "\n")
+        self.results_text.insert("end", f"• {match['flow']} ({match['score']:.1f}%)\n")
+        self.results_text.insert(
+            "end", f"• Step {match['step'] + 1}/{match['total_steps']}: {match['step_name']}\n"
+        )
+        lag = match["lag_seconds"]
+        if abs(lag) >= 1:
+            tag = "warning" if lag > 0 else "success"
+            text = f"{lag:.1f}s behind the tempo" if lag > 0 else f"{-lag:.1f}s ahead of the tempo"
+            self.results_text.insert("end", f"• {text}\n", tag)
+    
+    def append_session_stats(self):
+        """
+        Append live session statistics to the results textbox
+        """
+        pose_name, hold = self.analytics.current_hold()
+        self.results_text.insert("end", "\nSESSION:\n")
+        self.results_text.insert("end", "─" * 20 + "\n")
+        self.results_text.insert("end", f"• Current hold: {hold:.1f}s ({pose_name})\n")
+        
+        for name, stats in self.analytics.pose_stats.items():
+            if name == SessionAnalytics.NO_POSE:
+                continue
+            self.results_text.insert(
+                "end", f"• {name}: {stats['dwell']:.1f}s total, longest {stats['longest_hold']:.1f}s\n"
+            )
+        
+        stability = self.analytics.joint_stability()
+        if stability:
+            joint, (_, std) = max(stability.items(), key=lambda item: item[1][1])
+            joint_name = joint.replace('_', ' ').title()
+            self.results_text.insert(
+                "end", f"• Least stable: {joint_name} (±{std:.1f}° over {self.analytics.window_seconds:.0f}s)\n"
+            )
+    
+    def export_session_stats(self):
+        if self.analytics.frame_count == 0:
+            messagebox.showwarning("Warning", "No session statistics to export")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if file_path:
+            with open(file_path, 'w') as f:
+                json.dump(self.analytics.summary(), f, indent=4)
+            self.status_label.configure(text=f"Session stats saved: {os.path.basename(file_path)}")
+    
+    def reset_session_stats(self):
+        self.analytics.reset()
+        self.status_label.configure(text="Session statistics reset")
+    
+    def provide_feedback(self, current_angles, target_pose_name, mirrored=False):
         """
-        Provide corrective feedback for yoga poses
+        Provide corrective feedback for yoga poses.
+        For a mirrored match each reference joint is compared with the opposite side.
         """
         feedback = []
         target_angles = self.classifier.reference_poses.get(target_pose_name, {})
         
         for joint, target_angle in target_angles.items():
-            if joint in current_angles:
-                current_angle = current_angles[joint]
+            observed_joint = mirror_joint(joint) if mirrored else joint
+            if observed_joint in current_angles:
+                current_angle = current_angles[observed_joint]
                 difference = abs(current_angle - target_angle)
                 
                 if difference > 15:
-                    joint_name = joint.replace('_', ' ').title()
+                    joint_name = observed_joint.replace('_', ' ').title()
                     if current_angle < target_angle:
                         feedback.append(f"Straighten your {joint_name} more")
                     else:
@@ -626,6 +1014,13 @@ class YogaPoseEstimatorGUI:
     def on_closing(self):
         """Clean up when closing the application"""
         self.stop_camera()
+        # Let a running export finish its file cleanly before the threads die
+        if self.export_thread is not None:
+            self.export_cancel.set()
+            self.export_thread.join()
+        self.close_results_log()
+        self.classifier.stop_watching()
+        self.analyzer.close()
         self.root.destroy()
 
 